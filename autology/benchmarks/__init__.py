@@ -0,0 +1 @@
+"""Benchmarks that are used to measure the performance of processing log files."""
@@ -0,0 +1,4 @@
+"""Execute the benchmark suite with: python -m autology.benchmarks"""
+from autology.benchmarks.suite import main
+
+main()
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark of the configuration access that is performed for each entry and each published page.
+
+Execute with: python -m autology.benchmarks.configuration
+"""
+import argparse
+import timeit
+
+import munch
+
+from autology import configuration, publishing
+from autology.utilities import entry_index
+
+
+def _per_entry_access(get_configuration):
+    """The configuration access performed when loading an entry with two datetime values and rendering two links."""
+    get_configuration().site.timezone
+    get_configuration().site.timezone
+    get_configuration().publishing.url_root
+    get_configuration().publishing.url_root
+    dict(get_configuration().site)
+
+
+def _rebuilt_configuration():
+    """Previous behavior, which converted the whole settings dictionary on each request."""
+    return munch.Munch.fromDict(configuration._settings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cost of the configuration access performed per entry')
+    parser.add_argument('--entries', type=int, default=100000, help='Number of entries to simulate')
+    args = parser.parse_args()
+
+    # Load up the default configuration values of the plugins so that the settings are a realistic size
+    publishing.load()
+    entry_index.load()
+
+    print('{:<24}{:>12}{:>16}'.format('mode', 'seconds', 'usec / entry'))
+    for name, get_configuration in (('rebuilt per call', _rebuilt_configuration),
+                                    ('cached snapshot', configuration.get_configuration)):
+        execution_time = timeit.timeit(lambda: _per_entry_access(get_configuration), number=args.entries)
+        print('{:<24}{:>12.3f}{:>16.2f}'.format(name, execution_time, execution_time / args.entries * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Builds reproducible synthetic log directories that are used by the benchmarks."""
+import datetime
+import pathlib
+import random
+
+import frontmatter
+import yaml
+
+from autology.utilities.log_file import MetaKeys
+
+ACTIVITIES = ['reading', 'exercise', 'project', 'meeting', 'travel']
+
+# Number of track points written into each of the GPX files
+GPX_POINTS = 120
+
+_GPX_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<gpx version="1.1" creator="autology-benchmarks" xmlns="http://www.topografix.com/GPX/1/1">\n'
+               '<trk><name>{name}</name><trkseg>\n')
+_GPX_POINT = '<trkpt lat="{lat:.6f}" lon="{lon:.6f}"><ele>{ele:.1f}</ele><time>{time:%Y-%m-%dT%H:%M:%SZ}</time></trkpt>\n'
+_GPX_FOOTER = '</trkseg></trk>\n</gpx>\n'
+
+
+def build_corpus(root, days=30, entries_per_day=3, start_date=datetime.date(2017, 1, 1), seed=0, years=None,
+                 yaml_fraction=0.0, gpx_fraction=0.0, projects=0, legacy_fraction=0.0):
+    """
+    Write out a synthetic log directory using the YYYY/MM/DD/file layout.
+    :param root: directory that the log directory will be created in.
+    :param days: number of days that will contain entries.
+    :param entries_per_day: number of entries that will be written out for each day.
+    :param start_date: first date that will contain entries.
+    :param seed: seed of the random number generator so that the same corpus is built each time.
+    :param years: number of years of entries to write, overrides days when provided.
+    :param yaml_fraction: fraction of the entries that are written as YAML data files.
+    :param gpx_fraction: fraction of the entries that are exercise entries with a GPX track.
+    :param projects: number of projects that are defined, and that project entries are logged against.
+    :param legacy_fraction: fraction of the markdown entries that are written in the format used before file version
+    0.1.0 (no agent definition and string time values), these must be updated with the update command.
+    :return: path to the log directory that was created.
+    """
+    generator = random.Random(seed)
+    log_directory = pathlib.Path(root) / 'log'
+
+    if years is not None:
+        days = (datetime.date(start_date.year + years, start_date.month, start_date.day) - start_date).days
+
+    if projects:
+        _write_project_definitions(log_directory, start_date, projects)
+
+    for day in range(days):
+        date = start_date + datetime.timedelta(days=day)
+        day_directory = _day_directory(log_directory, date)
+        day_directory.mkdir(parents=True, exist_ok=True)
+
+        for index in range(entries_per_day):
+            start_time = datetime.datetime.combine(date, datetime.time(8)) + datetime.timedelta(hours=index)
+            end_time = start_time + datetime.timedelta(minutes=generator.randint(5, 55))
+
+            kind = generator.random()
+            if kind < gpx_fraction:
+                _write_gpx_entry(log_directory, day_directory, start_time, end_time, generator)
+            elif kind < gpx_fraction + yaml_fraction:
+                _write_yaml_entry(day_directory, start_time, end_time, generator)
+            elif generator.random() < legacy_fraction:
+                _write_legacy_entry(day_directory, start_time, end_time, day, index, generator)
+            else:
+                activities = generator.sample(ACTIVITIES, generator.randint(0, 2))
+                metadata = _metadata(start_time, end_time, activities)
+                if projects and 'project' in activities:
+                    metadata['mkl-project'] = 'project_{}'.format(generator.randrange(projects))
+
+                _write_markdown(day_directory / '{:%H%M%S}.md'.format(start_time), metadata,
+                                '# Entry {}\n\nSome *markdown* content for entry {}.\n'.format(index, day))
+
+    return log_directory
+
+
+def _day_directory(log_directory, date):
+    """Directory that stores the files of the date."""
+    return log_directory / '{:04d}'.format(date.year) / '{:02d}'.format(date.month) / '{:02d}'.format(date.day)
+
+
+def _metadata(start_time, end_time, activities):
+    """Front matter of an entry in the current file version."""
+    return {
+        MetaKeys.TIME: start_time,
+        MetaKeys.END_TIME: end_time,
+        MetaKeys.LOCATION: 'home',
+        MetaKeys.ACTIVITIES: activities,
+        MetaKeys.AGENT_DEFINITION: {
+            MetaKeys.Agent.NAME: 'autology',
+            MetaKeys.Agent.VERSION: '0.0.0',
+            MetaKeys.Agent.FILE_VERSION: '{}'.format(MetaKeys.CURRENT_FILE_VERSION),
+        }
+    }
+
+
+def _write_markdown(path, metadata, content):
+    path.write_text(frontmatter.dumps(frontmatter.Post(content, **metadata)))
+
+
+def _write_legacy_entry(day_directory, start_time, end_time, day, index, generator):
+    """Markdown entry without an agent definition, and time values stored as HH:MM strings."""
+    _write_markdown(day_directory / '{:%H%M%S}.md'.format(start_time), {
+        MetaKeys.TIME: '{:%H:%M}'.format(start_time),
+        MetaKeys.END_TIME: '{:%H:%M}'.format(end_time),
+        MetaKeys.LOCATION: 'home',
+        MetaKeys.ACTIVITIES: generator.sample(ACTIVITIES, generator.randint(0, 2)),
+    }, '# Entry {}\n\nSome *markdown* content for legacy entry {}.\n'.format(index, day))
+
+
+def _write_yaml_entry(day_directory, start_time, end_time, generator):
+    """YAML data file containing a front matter definition followed by measurement documents."""
+    metadata = _metadata(start_time, end_time, ['measurements'])
+    documents = [{'measurement': 'weight', 'value': round(generator.uniform(60, 90), 1)},
+                 {'measurement': 'heart_rate', 'value': generator.randint(50, 90)}]
+
+    (day_directory / '{:%H%M%S}.yaml'.format(start_time)).write_text(
+        frontmatter.dumps(frontmatter.Post(yaml.safe_dump_all(documents, default_flow_style=False), **metadata)))
+
+
+def _write_gpx_entry(log_directory, day_directory, start_time, end_time, generator):
+    """Exercise markdown entry that references a GPX track stored in the same day directory."""
+    gpx_path = day_directory / '{:%H%M%S}.gpx'.format(start_time)
+
+    latitude, longitude, elevation = generator.uniform(30, 45), generator.uniform(-120, -75), generator.uniform(0, 500)
+    step = (end_time - start_time) / GPX_POINTS
+    with gpx_path.open('w') as gpx_file:
+        gpx_file.write(_GPX_HEADER.format(name=gpx_path.stem))
+        for point in range(GPX_POINTS):
+            latitude += generator.uniform(-0.0005, 0.0005)
+            longitude += generator.uniform(-0.0005, 0.0005)
+            elevation += generator.uniform(-1, 1)
+            gpx_file.write(_GPX_POINT.format(lat=latitude, lon=longitude, ele=elevation,
+                                             time=start_time + step * point))
+        gpx_file.write(_GPX_FOOTER)
+
+    metadata = _metadata(start_time, end_time, ['exercise'])
+    metadata['gpx_file'] = gpx_path.relative_to(log_directory).as_posix()
+    _write_markdown(day_directory / '{:%H%M%S}.md'.format(start_time), metadata, 'Went for a run.\n')
+
+
+def _write_project_definitions(log_directory, start_date, projects):
+    """YAML file defining the organizations, customers and projects that the project entries are logged against."""
+    day_directory = _day_directory(log_directory, start_date)
+    day_directory.mkdir(parents=True, exist_ok=True)
+
+    start_time = datetime.datetime.combine(start_date, datetime.time(0))
+    documents = [{'mkl-customer': {'id': 'customer_{}'.format(index), 'name': 'Customer {}'.format(index)}}
+                 for index in range(max(1, projects // 4))]
+    documents.append({'mkl-organization': {
+        'id': 'organization_0',
+        'name': 'Organization 0',
+        'projects': [{'id': 'project_{}'.format(index), 'name': 'Project {}'.format(index),
+                      'customer': 'customer_{}'.format(index % max(1, projects // 4))} for index in range(projects)],
+    }})
+
+    (day_directory / 'projects.yaml').write_text(
+        frontmatter.dumps(frontmatter.Post(yaml.safe_dump_all(documents, default_flow_style=False),
+                                           **_metadata(start_time, start_time + datetime.timedelta(minutes=1),
+                                                       ['project']))))
@@ -0,0 +1,73 @@
+"""
+Benchmark that measures the memory used to hold the entries of a log directory, with the metadata stored as
+dictionaries and as compact metadata, and the time taken to sort the entries by their time and by the epoch seconds
+that the log files are ordered by.
+
+Execute with: python -m autology.benchmarks.entries
+"""
+import argparse
+import gc
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+from autology.benchmarks.corpus import build_corpus
+from autology.utilities import log_file
+from autology.utilities.processors import markdown
+
+
+def measure_entries(files, compact):
+    """
+    Load the entries of all of the files and measure the memory they hold.
+    :return: tuple containing the number of entries, the bytes allocated for them, the size of the pickled entries, and
+    the time in seconds to sort them by time and by their epoch seconds.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        entries = [log_file.load_lazy_entry(file, markdown.MIME_TYPE, compact=compact) for file in files]
+
+        # The content reads and built times are cached, so clear them out of the measurement
+        log_file._read_content.cache_clear()
+        log_file._from_epoch.cache_clear()
+        gc.collect()
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    pickled_size = len(pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL))
+
+    start_time = time.perf_counter()
+    sorted(entries, key=lambda x: x.metadata[log_file.MetaKeys.TIME])
+    sort_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    sorted(entries, key=log_file.entry_timestamp)
+    timestamp_sort_time = time.perf_counter() - start_time
+
+    return len(entries), allocated, pickled_size, sort_time, timestamp_sort_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory used by the loaded entries')
+    parser.add_argument('--entries', type=int, default=100000, help='Number of entries in the synthetic log')
+    parser.add_argument('--entries-per-day', type=int, default=10, help='Number of entries written for each day')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        log_directory = build_corpus(root, days=max(1, args.entries // args.entries_per_day),
+                                     entries_per_day=args.entries_per_day)
+        files = sorted(log_directory.glob('**/*.md'))
+
+        print('{:<12}{:>10}{:>14}{:>16}{:>14}{:>12}{:>16}'.format('metadata', 'entries', 'bytes', 'bytes/entry',
+                                                                   'pickled', 'sort (s)', 'epoch sort (s)'))
+        for name, compact in (('dict', False), ('compact', True)):
+            entries, allocated, pickled_size, sort_time, timestamp_sort_time = measure_entries(files, compact)
+            print('{:<12}{:>10}{:>14}{:>16.1f}{:>14}{:>12.3f}{:>16.3f}'.format(name, entries, allocated,
+                                                                             allocated / entries, pickled_size,
+                                                                             sort_time, timestamp_sort_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark that counts the number of times that the log files are parsed while walking through the log directories.
+
+Execute with: python -m autology.benchmarks.parsing
+"""
+import argparse
+import tempfile
+import time
+
+from autology.benchmarks.corpus import build_corpus
+from autology.utilities import log_file
+from autology.utilities.processors import markdown
+
+
+def _register_counting_processor(counter):
+    """Register the markdown file processor with a loader that counts each time that it is called."""
+    markdown.register()
+    file_processor = log_file.get_file_processor(mime_type=markdown.MIME_TYPE)
+
+    def _counting_load(path):
+        counter['parses'] += 1
+        return file_processor.load(path)
+
+    log_file.register_file_processor(markdown.MIME_TYPE, _counting_load, file_processor.write)
+
+    return file_processor
+
+
+def measure_walk(log_directory, retain_limit=None):
+    """
+    Walk through all of the entries in the log directory.
+    :return: tuple containing the number of entries yielded, the number of parses and the time in seconds.
+    """
+    counter = {'parses': 0}
+    original_processor = _register_counting_processor(counter)
+
+    try:
+        start_time = time.perf_counter()
+        entries = sum(1 for _ in log_file.walk_log_files([str(log_directory)], retain_limit=retain_limit))
+        execution_time = time.perf_counter() - start_time
+    finally:
+        log_file.register_file_processor(markdown.MIME_TYPE, original_processor.load, original_processor.write)
+
+    return entries, counter['parses'], execution_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the parses performed while walking the log files')
+    parser.add_argument('--days', type=int, default=365, help='Number of days in the synthetic log')
+    parser.add_argument('--entries-per-day', type=int, default=3, help='Number of entries written for each day')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        log_directory = build_corpus(root, days=args.days, entries_per_day=args.entries_per_day)
+
+        # A retain limit of zero loads every file again when it is yielded, which was the previous behavior.
+        print('{:<24}{:>10}{:>10}{:>12}'.format('mode', 'entries', 'parses', 'seconds'))
+        for name, retain_limit in (('reload every file', 0), ('bounded (100 files)', 100), ('single parse', None)):
+            entries, parses, execution_time = measure_walk(log_directory, retain_limit=retain_limit)
+            print('{:<24}{:>10}{:>10}{:>12.3f}'.format(name, entries, parses, execution_time))
+
+
+if __name__ == '__main__':
+    main()
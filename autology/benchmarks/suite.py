@@ -0,0 +1,287 @@
+"""
+Benchmark suite that times the commands that work with the log directory (generate, update and make_note) against
+synthetic log directories.  The commands are executed in separate processes so that start up costs are included in the
+measurements.  Results are written as JSON, and can be compared against a previously saved result to flag regressions.
+
+Execute with: python -m autology.benchmarks --output results.json
+Compare with: python -m autology.benchmarks --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from autology.benchmarks.corpus import build_corpus
+
+# Order that the scenarios are executed in, make_note is last because it adds a file to the generated log directory.
+SCENARIOS = ['generate_cold', 'generate_warm', 'generate_incremental', 'update_files', 'make_note']
+
+# Relative increase of the median time that is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+DEFAULT_COMMAND = [sys.executable, '-m', 'autology.commands.main']
+
+_TEMPLATE_DEFINITION = {
+    'name': 'Benchmark',
+    'version': '0.0.1',
+    'static_files': [],
+    'variables': {},
+    'templates': {
+        'index': {'index': {'template': 'index.html', 'destination': 'index.html'}},
+        'timeline': {
+            'day': {'template': 'day.html', 'destination': 'timeline/{date:%Y/%m/%d}/index.html'},
+            'index': {'template': 'list.html', 'destination': 'timeline/index.html'},
+        },
+        'simple': {
+            'day': {'template': 'day.html', 'destination': '{id}/{date:%Y/%m/%d}/index.html'},
+            'index': {'template': 'list.html', 'destination': '{id}/index.html'},
+        },
+        'exercise': {
+            'day': {'template': 'day.html', 'destination': 'exercise/{date:%Y/%m/%d}/index.html'},
+            'index': {'template': 'list.html', 'destination': 'exercise/index.html'},
+            'data_file': {'destination': 'exercise/{date:%Y/%m/%d}/{file_name}'},
+        },
+        'project': {
+            'project': {'template': 'project.html', 'destination': 'project/{project[id]}.html'},
+            'index': {'template': 'projects.html', 'destination': 'project/index.html'},
+        },
+    },
+}
+
+_TEMPLATES = {
+    'index.html': '<h1>{{ site.title }}</h1>{% for r in reports %}<a href="{{ r.url|autology_url }}">{{ r.name }}</a>'
+                  '{% endfor %}',
+    'day.html': '<h1>{{ date }}</h1>{% for e in entries %}<div>{{ e.metadata.time }} {{ e.content|markdown }}</div>'
+                '{% endfor %}',
+    'list.html': '{% for d in dates %}<a href="{{ d.url|autology_url }}">{{ d.date }} {{ d.num_entries }}</a>'
+                 '{% endfor %}',
+    'project.html': '<h1>{{ project.id }} {{ project.duration }}</h1>{% for e in project.log %}<div>'
+                    '{{ e.metadata.time }} {{ e.content|markdown }}</div>{% endfor %}',
+    'projects.html': '{% for p in projects %}<a href="{{ p.url }}">{{ p.id }}</a>{% endfor %}',
+}
+
+_CONFIGURATION = {
+    'publishing': {'templates': 'templates', 'output': 'output', 'url_root': '/'},
+    'site': {'title': 'Benchmark'},
+    'simple': {'activities': [{'id': activity, 'name': activity.title(), 'description': activity}
+                              for activity in ('reading', 'meeting', 'travel')]},
+    'make_note': {'editor': 'true {file}'},
+}
+
+
+def build_project(root, **corpus_arguments):
+    """
+    Write out a project directory containing a configuration file, a minimal template set and a synthetic log
+    directory.
+    :param root: directory that will contain the project.
+    :param corpus_arguments: arguments provided to build_corpus.
+    :return: path to the project directory.
+    """
+    project_path = pathlib.Path(root)
+    project_path.mkdir(parents=True, exist_ok=True)
+
+    template_path = project_path / 'templates'
+    template_path.mkdir(parents=True, exist_ok=True)
+    (template_path / 'template.yaml').write_text(yaml.safe_dump(_TEMPLATE_DEFINITION, default_flow_style=False))
+    for name, content in _TEMPLATES.items():
+        (template_path / name).write_text(content)
+
+    (project_path / 'config.yaml').write_text(yaml.safe_dump(_CONFIGURATION, default_flow_style=False))
+
+    build_corpus(project_path, **corpus_arguments)
+
+    return project_path
+
+
+class _Runner:
+    """Executes the autology commands in a project directory and times them."""
+
+    def __init__(self, command, repeat):
+        self.command = command
+        self.repeat = repeat
+
+    def time(self, project_path, arguments, prepare=None):
+        """
+        Execute the command repeatedly, returning the number of seconds that each execution took.
+        :param project_path: directory the command is executed in.
+        :param arguments: sub-command arguments.
+        :param prepare: function that is called before each execution, it is not included in the time.
+        """
+        runs = []
+        for run in range(self.repeat):
+            if prepare is not None:
+                prepare(run)
+
+            start_time = time.perf_counter()
+            subprocess.run(self.command + arguments, cwd=str(project_path), check=True, stdout=subprocess.DEVNULL)
+            runs.append(time.perf_counter() - start_time)
+
+        return runs
+
+
+def run_scenarios(root, runner, scenarios, corpus_arguments, legacy_fraction):
+    """
+    Build the projects and time each of the scenarios.
+    :return: dictionary of scenario names to the list of the times of each execution.
+    """
+    root = pathlib.Path(root)
+
+    # The scenarios modify the projects, so the projects of a previous execution in the directory are built again.
+    for name in ('generate', 'update', 'update_log'):
+        shutil.rmtree(str(root / name), ignore_errors=True)
+
+    project_path = build_project(root / 'generate', **corpus_arguments)
+
+    # The update project keeps a pristine copy of its log directory, so that each execution has the same work to do.
+    update_path = build_project(root / 'update', legacy_fraction=legacy_fraction, **corpus_arguments)
+    pristine_log = root / 'update_log'
+    shutil.copytree(str(update_path / 'log'), str(pristine_log))
+
+    def _clean_build(run):
+        shutil.rmtree(str(project_path / 'output'), ignore_errors=True)
+        shutil.rmtree(str(project_path / '.autology'), ignore_errors=True)
+
+    def _modify_entry(run):
+        # Edit the last markdown entry, which only changes the pages that depend on it.
+        entry_path = sorted((project_path / 'log').glob('*/*/*/*.md'))[-1]
+        with entry_path.open('a') as entry_file:
+            entry_file.write('\nEdit {}\n'.format(run))
+
+    def _restore_log(run):
+        shutil.rmtree(str(update_path / 'log'))
+        shutil.copytree(str(pristine_log), str(update_path / 'log'))
+
+    definitions = {
+        'generate_cold': (project_path, ['generate'], _clean_build),
+        'generate_warm': (project_path, ['generate'], None),
+        'generate_incremental': (project_path, ['generate'], _modify_entry),
+        'update_files': (update_path, ['update', '--files'], _restore_log),
+        'make_note': (project_path, ['make_note'], None),
+    }
+
+    results = {}
+    for scenario in SCENARIOS:
+        if scenario not in scenarios:
+            continue
+
+        path, arguments, prepare = definitions[scenario]
+
+        # The warm and incremental scenarios require the site to have been generated.
+        if scenario in ('generate_warm', 'generate_incremental') and not (path / 'output').exists():
+            subprocess.run(runner.command + ['generate'], cwd=str(path), check=True, stdout=subprocess.DEVNULL)
+
+        results[scenario] = runner.time(path, arguments, prepare)
+        print('{:<24}{:>12.3f}'.format(scenario, statistics.median(results[scenario])), flush=True)
+
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the median times of the scenarios that are in both results.
+    :param baseline: results that were previously saved.
+    :param current: results of the current execution.
+    :param threshold: relative increase of the median time that is reported as a regression.
+    :return: list of tuples (scenario, baseline median, current median, relative change, regressed)
+    """
+    comparisons = []
+    for scenario, result in current['scenarios'].items():
+        if scenario not in baseline['scenarios']:
+            continue
+
+        baseline_median = baseline['scenarios'][scenario]['median']
+        change = (result['median'] - baseline_median) / baseline_median if baseline_median else 0.0
+        comparisons.append((scenario, baseline_median, result['median'], change, change > threshold))
+
+    return comparisons
+
+
+def _summarize(runs):
+    return {'median': statistics.median(runs), 'min': min(runs), 'runs': runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the autology commands against synthetic log directories')
+    parser.add_argument('--years', type=int, default=1, help='Number of years of log entries')
+    parser.add_argument('--entries-per-day', type=int, default=3, help='Number of entries written for each day')
+    parser.add_argument('--yaml-fraction', type=float, default=0.1, help='Fraction of entries that are YAML files')
+    parser.add_argument('--gpx-fraction', type=float, default=0.05, help='Fraction of entries with GPX tracks')
+    parser.add_argument('--projects', type=int, default=8, help='Number of projects that are defined')
+    parser.add_argument('--legacy-fraction', type=float, default=0.5,
+                        help='Fraction of the markdown entries that must be updated in the update_files scenario')
+    parser.add_argument('--seed', type=int, default=0, help='Seed used to build the log directories')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of times each scenario is executed')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Scenario to execute, may be repeated.  Default: all scenarios')
+    parser.add_argument('--command', type=shlex.split, default=DEFAULT_COMMAND,
+                        help='Command that executes autology.  Default: {}'.format(' '.join(DEFAULT_COMMAND)))
+    parser.add_argument('--directory', help='Directory the projects are built in, a temporary directory is used and '
+                                            'removed when not provided')
+    parser.add_argument('--output', '-o', help='File the JSON results are written to')
+    parser.add_argument('--compare', help='JSON results of a previous execution to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative increase of the median time reported as a regression.  Default: %(default)s')
+    args = parser.parse_args()
+
+    corpus_arguments = {'years': args.years, 'entries_per_day': args.entries_per_day,
+                        'yaml_fraction': args.yaml_fraction, 'gpx_fraction': args.gpx_fraction,
+                        'projects': args.projects, 'seed': args.seed}
+
+    print('{:<24}{:>12}'.format('scenario', 'sec (median)'))
+    runner = _Runner(args.command, args.repeat)
+    scenarios = args.scenario or SCENARIOS
+    if args.directory:
+        runs = run_scenarios(args.directory, runner, scenarios, corpus_arguments, args.legacy_fraction)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            runs = run_scenarios(root, runner, scenarios, corpus_arguments, args.legacy_fraction)
+
+    results = {
+        'metadata': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'command': args.command,
+            'repeat': args.repeat,
+            'corpus': dict(corpus_arguments, legacy_fraction=args.legacy_fraction),
+        },
+        'scenarios': {scenario: _summarize(scenario_runs) for scenario, scenario_runs in runs.items()},
+    }
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        if baseline['metadata'].get('corpus') != results['metadata']['corpus']:
+            print('Warning: the baseline was measured with a different corpus: {}'.format(
+                baseline['metadata'].get('corpus')))
+
+        print()
+        print('{:<24}{:>12}{:>12}{:>10}'.format('scenario', 'baseline', 'current', 'change'))
+        regressions = 0
+        for scenario, baseline_median, current_median, change, regressed in compare_results(baseline, results,
+                                                                                            args.threshold):
+            regressions += regressed
+            print('{:<24}{:>12.3f}{:>12.3f}{:>+9.1%}{}'.format(scenario, baseline_median, current_median, change,
+                                                               '  REGRESSION' if regressed else ''))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
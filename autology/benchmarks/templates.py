@@ -0,0 +1,127 @@
+"""
+Benchmark of the time taken from creating the publishing environment to the first rendered page, with and without the
+template bytecode cache.
+
+Execute with: python -m autology.benchmarks.templates
+"""
+import argparse
+import pathlib
+import statistics
+import tempfile
+import time
+
+from autology import publishing
+
+_BASE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>{% block title %}{{ site.title }}{% endblock %}</title>
+  {% for stylesheet in template.stylesheets %}<link rel="stylesheet" href="{{ stylesheet|autology_url }}">{% endfor %}
+</head>
+<body>
+  <nav>
+  {% for link in template.navigation %}
+    <a href="{{ link.url|autology_url }}" class="{% if link.active %}active{% endif %}">{{ link.name|title }}</a>
+  {% endfor %}
+  </nav>
+  {% block content %}{% endblock %}
+</body>
+</html>
+"""
+
+_MACROS_TEMPLATE = """{% macro entry_summary(entry) -%}
+  <div class="entry">
+    <h3>{{ entry.title|default('Untitled') }}</h3>
+    <p>{{ entry.start|string }} - {{ entry.end|string }}</p>
+    {% if entry.activities %}<ul>{% for activity in entry.activities|sort %}<li>{{ activity }}</li>{% endfor %}</ul>
+    {% endif %}
+    {{ entry.content|markdown|safe }}
+  </div>
+{%- endmacro %}
+"""
+
+_PAGE_TEMPLATE = """{% extends "base.html" %}
+{% from "macros.html" import entry_summary %}
+{% block title %}{{ date }} - {{ super() }}{% endblock %}
+{% block content %}
+  {% for group in entries|groupby('category') %}
+    <section>
+      <h2>{{ group.grouper|upper }} ({{ group.list|length }})</h2>
+      {% for entry in group.list %}{{ entry_summary(entry) }}{% endfor %}
+    </section>
+  {% else %}
+    <p>No entries.</p>
+  {% endfor %}
+  {% set total = entries|sum(attribute='minutes') %}
+  <footer>{{ total // 60 }} hours {{ total % 60 }} minutes</footer>
+{% endblock %}
+"""
+
+# Number of additional page templates that are compiled before the first render, similar to a full template set.
+_PAGE_COUNT = 12
+
+
+def build_templates(root):
+    """Write out a template set that uses inheritance, macros and the custom filters."""
+    template_path = pathlib.Path(root) / 'templates'
+    template_path.mkdir(parents=True)
+
+    (template_path / 'base.html').write_text(_BASE_TEMPLATE)
+    (template_path / 'macros.html').write_text(_MACROS_TEMPLATE)
+    for index in range(_PAGE_COUNT):
+        (template_path / 'page_{}.html'.format(index)).write_text(_PAGE_TEMPLATE)
+
+    return template_path
+
+
+def _context():
+    """Context values for the first rendered page."""
+    return {
+        'site': {'title': 'Benchmark'},
+        'template': {'stylesheets': ['/static/site.css'], 'navigation': [{'url': '/', 'name': 'index'}]},
+        'date': '2017-01-01',
+        'entries': [{'title': 'Entry {}'.format(index), 'category': 'work' if index % 2 else 'home',
+                     'start': '09:00', 'end': '10:00', 'activities': ['reading'], 'content': 'Some *content*',
+                     'minutes': 60} for index in range(10)],
+    }
+
+
+def measure_first_render(template_path, bytecode_directory):
+    """Create an environment, load all of the templates and render the first page, returning the time in seconds."""
+    start_time = time.perf_counter()
+
+    environment = publishing.create_environment(template_path, bytecode_directory)
+    for name in sorted(environment.list_templates()):
+        environment.get_template(name)
+    environment.get_template('page_0.html').render(_context())
+
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the time from startup to the first rendered page')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of times to measure each mode')
+    args = parser.parse_args()
+
+    # Load up the default configuration values that are used by the custom filters
+    publishing.load()
+
+    with tempfile.TemporaryDirectory() as root:
+        template_path = build_templates(root)
+        bytecode_directory = pathlib.Path(root) / 'bytecode'
+
+        # Warm up the imports and filters so that the first measurement isn't penalized.
+        measure_first_render(template_path, None)
+
+        print('{:<24}{:>16}'.format('mode', 'msec (median)'))
+        no_cache = [measure_first_render(template_path, None) for _ in range(args.repeat)]
+        print('{:<24}{:>16.2f}'.format('no bytecode cache', statistics.median(no_cache) * 1000))
+
+        # Populate the cache once, each of the following measurements loads the compiled templates.
+        measure_first_render(template_path, bytecode_directory)
+        warm_cache = [measure_first_render(template_path, bytecode_directory) for _ in range(args.repeat)]
+        print('{:<24}{:>16.2f}'.format('bytecode cache', statistics.median(warm_cache) * 1000))
+
+
+if __name__ == '__main__':
+    main()
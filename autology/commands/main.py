@@ -2,7 +2,7 @@ import argparse
 
 from pkg_resources import iter_entry_points
 
-from autology import topics, logging as autology_logging
+from autology import profiling, topics, logging as autology_logging
 from autology.configuration import load_configuration_file as _load_configuration_file
 from autology.utilities.plugins import COMMANDS_ENTRY_POINT
 
@@ -11,6 +11,11 @@ def _build_arguments():
     """Load sub-commands defined in setup.py and allow them to build their arguments."""
     parser = argparse.ArgumentParser(description='Execute autology root command')
     parser.add_argument('--config', '-c', action='store', default='config.yaml',)
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the time taken by each phase, topic, listener, file processor and template')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='Profile the command with cProfile and write the statistics to the file, implies '
+                             '--profile')
 
     # Process all of the sub-commands that have been registered
     subparsers = parser.add_subparsers(help='sub-command help')
@@ -25,6 +30,10 @@ def main():
     parser = _build_arguments()
     args = parser.parse_args()
 
+    # Instrumentation must be enabled before the plugins are loaded, so that the file processors they register are timed
+    if args.profile or args.profile_output:
+        profiling.enable(profile_file=args.profile_output)
+
     # Load up default logging configuration
     autology_logging.load()
 
@@ -44,11 +53,15 @@ def main():
 
     # Execute the sub-command requested. (as per the argparse documentation)
     if hasattr(args, 'func'):
-        args.func(args)
+        with profiling.measure('phase', 'command'):
+            args.func(args)
     else:
         parser.print_help()
 
-    topics.Application.FINALIZE.publish()
+    with profiling.measure('phase', 'finalize'):
+        topics.Application.FINALIZE.publish()
+
+    profiling.report(profile_file=args.profile_output)
 
 
 if __name__ == '__main__':
@@ -1,21 +1,38 @@
 """Sub command that will generate the content of the static site."""
+import os
+import pathlib
+import sys
+import time
+
 from pkg_resources import iter_entry_points
 
 
-from autology import topics
-from autology.configuration import get_configuration
+from autology import topics, publishing
+from autology.configuration import get_configuration, get_cache_directory
 from autology.publishing import load as load_publishing_plugin
-from autology.utilities import log_file, plugins
+from autology.utilities import dependencies, entry_index, log_file, metrics, plugins, watcher
 
 
 def register_command(subparser):
     """Register the sub-command with any additional arguments."""
     generator_parser = subparser.add_parser('generate', help='Generate the static content')
     generator_parser.set_defaults(func=_main)
-    generator_parser.set_defaults(configure=_configure)
-
-
-def _configure():
+    generator_parser.set_defaults(configure=load_plugins)
+
+    generator_parser.add_argument('--force', '-f', action='store_true',
+                                  help='Render all of the output files, even if their inputs have not changed')
+    generator_parser.add_argument('--explain', action='store_true',
+                                  help='Print the reason that each of the output files was rendered')
+    generator_parser.add_argument('--jobs', '-j', type=int, default=1,
+                                  help='Number of processes that will be used to load the log files')
+    generator_parser.add_argument('--watch', '-w', action='store_true',
+                                  help='Keep running and generate the site again when the log files, templates or '
+                                       'configuration file are modified')
+    generator_parser.add_argument('--poll', action='store_true',
+                                  help='Poll for modifications instead of using file system notifications')
+
+
+def load_plugins():
     """
     Load up the report plugins and allow them to insert their configuration details into the default configuration
     object.
@@ -27,32 +44,197 @@ def _configure():
         entry_point.load()()
 
     load_publishing_plugin()
+    entry_index.load()
+    metrics.load()
 
 
 def _main(args):
+    _generate(args, force=args.force)
+
+    if args.watch:
+        _watch(args)
+
+
+def _generate(args, force=False):
+    """Process all of the log files and publish the pages whose inputs have changed."""
+    initial_statistics = publishing.get_output_statistics()
+    run_metrics = metrics.RunMetrics()
+
+    # Only the outputs whose entries, templates or configuration values have changed will be rendered
+    index = entry_index.get_index()
+    with run_metrics.phase('load dependencies'):
+        dependency_graph = publishing.track_dependencies(get_cache_directory() / 'dependencies.json',
+                                                         entry_digest=get_entry_digest(index), force=force,
+                                                         explain=_explain if args.explain else None)
+
+    processing_statistics = process_log_files(jobs=args.jobs, run_metrics=run_metrics)
+
+    # Wait for all of the published pages to be rendered before recording the dependencies of the outputs
+    with run_metrics.phase('wait for renders'):
+        publishing.flush()
+
+    with run_metrics.phase('save dependencies'):
+        dependency_graph.save()
+        if index is not None:
+            index.commit()
+
+    if args.explain:
+        print('Rendered {} files, {} files were unchanged.'.format(dependency_graph.rendered, dependency_graph.skipped))
+
+    output_statistics = {key: value - initial_statistics[key]
+                         for key, value in publishing.get_output_statistics().items()}
+    print('Wrote {} files ({} bytes), skipped {} unchanged files.'.format(output_statistics['written'],
+                                                                         output_statistics['bytes_written'],
+                                                                         output_statistics['skipped']))
+
+    run_metrics.values.update(processing_statistics,
+                              pages_rendered=dependency_graph.rendered,
+                              pages_skipped=dependency_graph.skipped,
+                              pages_written=output_statistics['written'],
+                              pages_unchanged=output_statistics['skipped'],
+                              bytes_written=output_statistics['bytes_written'])
+    metrics.append(run_metrics)
+
+
+def get_entry_digest(index):
+    """Provide the function that calculates the content hash of the log files, using the index when it is enabled."""
+    if index is None:
+        return None
+
+    def entry_digest(file):
+        return index.digest(file) or dependencies.stat_digest(file)
+
+    return entry_digest
+
+
+def process_log_files(jobs=1, run_metrics=None):
+    """
+    Publish all of the log files to the report plugins in date order, followed by the topics that build the reports.
+    :param jobs: number of processes that will be used to load the log files.
+    :param run_metrics: optional autology.utilities.metrics.RunMetrics that the time taken to load the log files, to
+    process their entries and to build the reports is recorded in.
+    :return: dictionary containing the number of files, entries and days that were processed, and the number of files
+    that were parsed and that were provided by the entry index.
+    """
     configuration_settings = get_configuration()
+    index = entry_index.get_index()
 
     topics.Processing.BEGIN.publish()
 
+    # The entries of each day are only collected when there are reports that handle them together.
+    day_entries = [] if topics.Processing.PROCESS_DAY.has_listeners() else None
+
+    statistics = {'files': 0, 'entries': 0, 'days': 0}
     current_date = None
-    for entry in log_file.walk_log_files(configuration_settings.processing.inputs):
+    current_file = None
+
+    # The files are loaded while the entries are iterated, so the time of each step is added to its phase.
+    load_time = process_time = 0.0
+    start_time = time.perf_counter()
+    for entry in log_file.walk_log_files(configuration_settings.processing.inputs,
+                                         entry_index=index,
+                                         retain_limit=configuration_settings.processing.retained_files,
+                                         jobs=jobs,
+                                         statistics=statistics):
+        loaded_time = time.perf_counter()
+        load_time += loaded_time - start_time
+
+        entry_date = entry.date.date()
 
         # Send out the day end event if current_date doesn't match the incoming date
-        if current_date and current_date != entry.date.date():
-            topics.Processing.DAY_END.publish(date=current_date)
+        if current_date and current_date != entry_date:
+            _end_day(current_date, day_entries)
 
         # Send out the day start event if necessary
-        if current_date != entry.date.date():
-            current_date = entry.date.date()
+        if current_date != entry_date:
+            current_date = entry_date
+            statistics['days'] += 1
             topics.Processing.DAY_START.publish(date=current_date)
 
+        # The entries of a file are provided together
+        statistics['entries'] += 1
+        if entry.file != current_file:
+            current_file = entry.file
+            statistics['files'] += 1
+
         # Send out the notification that the file should be processed
         topics.Processing.PROCESS_FILE.publish(entry=entry)
+        if day_entries is not None:
+            day_entries.append(entry)
+
+        start_time = time.perf_counter()
+        process_time += start_time - loaded_time
+
+    loaded_time = time.perf_counter()
+    load_time += loaded_time - start_time
 
     # Have to send out the last day end
     if current_date:
-        topics.Processing.DAY_END.publish(date=current_date)
+        _end_day(current_date, day_entries)
+
+    reports_time = time.perf_counter()
+    process_time += reports_time - loaded_time
 
     topics.Processing.END.publish()
 
     topics.Reporting.BUILD_MASTER.publish()
+
+    if run_metrics is not None:
+        run_metrics.add_phase('load log files', load_time)
+        run_metrics.add_phase('process entries', process_time)
+        run_metrics.add_phase('build reports', time.perf_counter() - reports_time)
+
+    return statistics
+
+
+def _end_day(date, day_entries):
+    """Send out the entries of the day to the reports that handle them together, followed by the day end event."""
+    if day_entries is not None:
+        topics.Processing.PROCESS_DAY.publish(date=date, entries=list(day_entries))
+        day_entries.clear()
+
+    topics.Processing.DAY_END.publish(date=date)
+
+
+def _watch(args):
+    """
+    Generate the site each time that the log files or templates are modified.  The caches (entry index, templates and
+    markdown) are kept between each generation, so only the modified log files are parsed, and only the pages whose
+    inputs changed are rendered.  Modifying the configuration file or template configuration restarts the command.
+    """
+    configuration_settings = get_configuration()
+    templates_path = pathlib.Path(configuration_settings.publishing.templates)
+    configuration_files = {pathlib.Path(args.config).resolve(),
+                           (templates_path / 'template.yaml').resolve()}
+
+    file_watcher = watcher.create_watcher(
+        list(configuration_settings.processing.inputs) + [templates_path] + list(configuration_files),
+        ignore=[configuration_settings.publishing.output, get_cache_directory()],
+        force_polling=args.poll)
+
+    print('Watching for modifications, press Ctrl-C to stop.')
+    restart = False
+    try:
+        while not restart:
+            changes = file_watcher.wait()
+
+            if changes is None or changes & configuration_files:
+                restart = True
+            else:
+                print('{} files modified, generating.'.format(len(changes)))
+                _generate(args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        file_watcher.close()
+
+    if restart:
+        # Plugins cannot load their configuration more than once, so start over with a new process.
+        print('Configuration modified, restarting.')
+        topics.Application.FINALIZE.publish()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def _explain(output_file, reasons):
+    """Print out the reasons that an output file was rendered."""
+    print('{}: {}'.format(output_file, '; '.join(reasons)))
@@ -0,0 +1,72 @@
+"""Sub-command that will manage the index of the entries that have been loaded from the log files."""
+import logging
+
+from pkg_resources import iter_entry_points
+
+from autology.configuration import get_configuration
+from autology.utilities import entry_index, log_file, plugins
+
+logger = logging.getLogger(__name__)
+
+
+def register_command(subparser):
+    """Register the sub-command with any additional arguments."""
+    parser = subparser.add_parser('index', help='Manage the index of the log file entries')
+    parser.set_defaults(func=_main)
+    parser.set_defaults(configure=_configure)
+
+    parser.add_argument('action', choices=['rebuild', 'verify'],
+                        help='rebuild: parse all of the log files and store them in a new index. verify: compare the '
+                             'contents of the index against the log files.')
+
+
+def _configure():
+    """Load up the file processors and the index configuration details."""
+    for entry_point in iter_entry_points(group=plugins.FILE_PROCESSOR_ENTRY_POINT):
+        entry_point.load()()
+
+    entry_index.load()
+
+
+def _main(args):
+    """Execute the requested action on the index."""
+    index = entry_index.get_index()
+
+    if index is None:
+        print('The entry index is disabled in the configuration file.')
+        return
+
+    if args.action == 'rebuild':
+        _rebuild(index)
+    elif args.action == 'verify':
+        _verify(index)
+
+
+def _rebuild(index):
+    """Remove all of the contents of the index and load all of the files again."""
+    index.clear()
+
+    indexed_files = 0
+    for file_component, file_processor in log_file.find_log_files(get_configuration().processing.inputs):
+        try:
+            loaded_entries = file_processor.load(file_component)
+        except KeyError:
+            logger.exception('Error processing file: {}'.format(file_component))
+            continue
+
+        if loaded_entries:
+            index.store(file_component, loaded_entries, file_processor.mime_type)
+            indexed_files += 1
+
+    print('Indexed {} files into: {}'.format(indexed_files, index.path))
+
+
+def _verify(index):
+    """Print out all of the files that do not match the contents of the index."""
+    files = [file_component for file_component, _ in log_file.find_log_files(get_configuration().processing.inputs)]
+    problems = index.verify(files)
+
+    for path, reason in problems:
+        print('{}: {}'.format(path, reason))
+
+    print('Verified {} files, {} did not match the index.'.format(len(files), len(problems)))
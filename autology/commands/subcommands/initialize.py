@@ -1,7 +1,7 @@
 """Sub-command that will initialize an autology area."""
 import pathlib
 
-from autology.configuration import get_configuration, dump_configuration
+from autology.configuration import copy_configuration, dump_configuration
 from autology.utilities import templates as template_utilities, plugins
 from autology.publishing import load as load_publishing_plugin
 from autology.storage import load as load_storage_plugin
@@ -48,7 +48,7 @@ def _main(args):
     templates_path = template_utilities.install_template(template_location, template_definition)
 
     # Now need to find the templates definition of that zip file and locate it in the file system so that it can be
-    settings = get_configuration()
+    settings = copy_configuration()
 
     # Override the configuration details with the new template path.  This should probably be handled by the publishing
     # plugin, but for now this will work
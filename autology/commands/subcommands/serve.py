@@ -1,12 +1,21 @@
 """Sub-command that hosts the output directory of the publisher as a web server."""
+import argparse
+import logging
 import pathlib
+import threading
+import time
 import urllib
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 
 import os
 import posixpath
 
-from autology.configuration import get_configuration
+from autology import publishing
+from autology.commands.subcommands import generate
+from autology.configuration import get_configuration, get_cache_directory
+from autology.utilities import entry_index, http_server, watcher
+
+logger = logging.getLogger(__name__)
 
 
 def register_command(subparser):
@@ -16,21 +25,64 @@ def register_command(subparser):
 
     parser.add_argument('--port', '-p', type=int, help='Port that the server will be listening on',
                         default=8080)
+    parser.add_argument('--mode', choices=['simple', 'asyncio'], default='simple',
+                        help='simple: single threaded server from the standard library. asyncio: concurrent server '
+                             'that keeps connections alive between requests.')
+    parser.add_argument('--workers', type=int, default=http_server.DEFAULT_WORKERS,
+                        help='Maximum number of requests that are handled at the same time in asyncio mode')
+    parser.add_argument('--lazy', action=_LazyAction,
+                        help='Process the log files without rendering the pages, and render each page when it is first '
+                             'requested (uses the asyncio mode)')
+
+
+class _LazyAction(argparse.Action):
+    """
+    Store true action of the lazy argument, which also loads the report plugins before the configuration is loaded, as
+    they are only needed when the log files are processed by the server.
+    """
+
+    def __init__(self, option_strings, dest, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, default=False, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, True)
+        namespace.configure = generate.load_plugins
 
 
 def _main(args):
     """Instantiate the server and start hosting files."""
-    server_address = ('localhost', args.port)
-    httpd = HTTPServer(server_address, _RequestHandler)
+    # The output directory is resolved once, instead of for each request.
+    output_path = pathlib.Path.cwd() / get_configuration().publishing.output
+
+    renderer = None
+    if args.lazy:
+        renderer = _DeferredPages()
+        renderer.start()
 
     print('Now listening on http://localhost:{}/'.format(args.port))
 
+    if args.mode == 'asyncio' or args.lazy:
+        server = http_server.StaticFileServer(output_path, workers=args.workers, renderer=renderer)
+        try:
+            server.serve_forever('localhost', args.port)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if renderer is not None:
+                renderer.stop()
+        return
+
+    _RequestHandler.output_path = str(output_path)
+    httpd = HTTPServer(('localhost', args.port), _RequestHandler)
     httpd.serve_forever()
 
 
 class _RequestHandler(SimpleHTTPRequestHandler):
     """Request handler that overrides translate path to provide the path of the publishing output."""
 
+    # Directory that the files are served from
+    output_path = None
+
     def translate_path(self, path):
         """Code copied from parent class except the definition of the path variable."""
         # abandon query parameters
@@ -47,7 +99,7 @@ class _RequestHandler(SimpleHTTPRequestHandler):
         words = filter(None, words)
 
         # Modify the path so that it is fetching files from the output directory, not the root of the project.
-        path = str(pathlib.Path.cwd() / get_configuration().publishing.output)
+        path = self.output_path
 
         for word in words:
             if os.path.dirname(word) or word in (os.curdir, os.pardir):
@@ -57,3 +109,69 @@ class _RequestHandler(SimpleHTTPRequestHandler):
         if trailing_slash:
             path += '/'
         return path
+
+
+class _DeferredPages:
+    """
+    Renders the pages that were published by the report plugins when they are requested.  The log files and templates
+    are watched, and the log files are processed again when they are modified.  Pages are only rendered again when
+    their inputs have changed.
+    """
+
+    def __init__(self):
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Process the log files and start watching for modifications."""
+        start_time = time.perf_counter()
+        self._process()
+        print('Processed log files in {:.2f} seconds, pages are rendered when requested.'.format(
+            time.perf_counter() - start_time))
+
+        self._thread = threading.Thread(target=self._watch, name='autology-watch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching for modifications."""
+        self._stopped.set()
+
+    def exists(self, path):
+        return publishing.is_deferred(path)
+
+    def render(self, path):
+        return publishing.render_deferred(path)
+
+    def _process(self):
+        """Publish all of the log files to the report plugins, recording the pages instead of rendering them."""
+        index = entry_index.get_index()
+        publishing.track_dependencies(get_cache_directory() / 'dependencies.json',
+                                      entry_digest=generate.get_entry_digest(index), force=True)
+
+        publishing.defer_rendering()
+        try:
+            generate.process_log_files()
+        finally:
+            publishing.finish_deferred()
+
+        if index is not None:
+            index.commit()
+
+    def _watch(self):
+        """Process the log files again each time that the log files or templates are modified."""
+        configuration_settings = get_configuration()
+        file_watcher = watcher.create_watcher(
+            list(configuration_settings.processing.inputs) + [configuration_settings.publishing.templates],
+            ignore=[configuration_settings.publishing.output, get_cache_directory()])
+
+        try:
+            while not self._stopped.is_set():
+                if file_watcher.wait(timeout=1.0) == set():
+                    continue
+
+                try:
+                    self._process()
+                except Exception:
+                    logger.exception('Cannot process the modified log files')
+        finally:
+            file_watcher.close()
@@ -0,0 +1,43 @@
+"""Sub-command that will manage the publishing templates that are used to generate the site."""
+import time
+
+from autology import publishing
+from autology.configuration import get_configuration
+
+
+def register_command(subparser):
+    """Register the sub-command with any additional arguments."""
+    parser = subparser.add_parser('templates', help='Manage the templates used to generate the site')
+    parser.set_defaults(func=_main)
+    parser.set_defaults(configure=_configure)
+
+    parser.add_argument('action', choices=['compile'],
+                        help='compile: compile all of the templates in the template set and store them in the bytecode '
+                             'cache.')
+
+
+def _configure():
+    """Load up the publishing configuration details."""
+    publishing.load()
+
+
+def _main(args):
+    """Execute the requested action on the templates."""
+    if args.action == 'compile':
+        _compile()
+
+
+def _compile():
+    """Compile all of the templates that are used by the template configuration."""
+    if not get_configuration().publishing.bytecode_cache:
+        print('The bytecode cache is disabled in the configuration file.')
+        return
+
+    start_time = time.perf_counter()
+    compiled = publishing.compile_templates()
+    execution_time = time.perf_counter() - start_time
+
+    for name in sorted(compiled):
+        print(name)
+
+    print('Compiled {} templates in {:.3f} seconds.'.format(len(compiled), execution_time))
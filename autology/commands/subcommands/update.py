@@ -1,7 +1,7 @@
 """Sub command that will generate the content of the static site."""
 import pathlib
 
-from autology.configuration import get_configuration, get_configuration_root, dump_configuration
+from autology.configuration import copy_configuration, get_configuration, get_configuration_root, dump_configuration
 from autology.commands.subcommands import updaters
 from autology.utilities import templates as template_utilities
 
@@ -15,6 +15,10 @@ def register_command(subparser):
     # Arguments
     update_parser.add_argument('-f', '--files', help='Update the files that are currently defined in the log '
                                                      'directories', action='store_true')
+    update_parser.add_argument('-n', '--dry-run', action='store_true',
+                               help='Report the log files that would be updated without modifying them')
+    update_parser.add_argument('-j', '--jobs', type=int, default=1,
+                               help='Number of processes that will be used to update the log files')
     update_parser.add_argument('-t', '--templates', help='Install a new output template', action='store_true')
     update_parser.add_argument('-T', '--template-definition', help='Define a template definition to install',
                                default=template_utilities.DEFAULT_TEMPLATES_URL)
@@ -23,16 +27,22 @@ def register_command(subparser):
 def _main(args):
     """Process the arguments provided and update the files as necessary."""
     if args.files:
-        _update_files()
+        _update_files(jobs=args.jobs, dry_run=args.dry_run)
 
     if args.templates:
         _update_template(args.template_definition)
 
 
-def _update_files():
-    """Find each of the files in the log file and hand them to the file updaters for processing."""
+def _update_files(jobs=1, dry_run=False):
+    """
+    Find each of the files in the log file and hand them to the file updaters for processing.
+    :param jobs: number of processes that will be used to update the files.
+    :param dry_run: report the files that would be updated without modifying them.
+    """
     configuration_settings = get_configuration()
 
+    migrated = current = failed = 0
+
     # Need to find all of the files that are stored in the input_files directories in order to start building the
     # reports that will be used to generate the static log files.
     for input_path in configuration_settings.processing.inputs:
@@ -40,10 +50,20 @@ def _update_files():
 
         # Currently going to make the assumption that everyone is using the path naming convention that I'm dictating
         # which is YYYY/MM/DD/file.ext
-        for file_component in search_path.glob('*/*/*/*'):
-            # Store all of the files into a dictionary containing the keys and a list of the files that are associated
-            # with that day
-            updaters.update_files(search_path, file_component)
+        files = sorted(search_path.glob('*/*/*/*'))
+        for result in updaters.migrate_files(search_path, files, jobs=jobs, dry_run=dry_run):
+            if result.error:
+                failed += 1
+                print('Cannot update: {}\n{}'.format(result.file, result.error))
+            elif result.migrations:
+                # Report the files that need to be migrated, and the version that they are migrated to
+                migrated += 1
+                print('{}: {} -> {}'.format(result.file, result.from_version, result.migrations[-1]))
+            elif result.from_version is not None:
+                current += 1
+
+    print('{} {} files, {} files are current, {} files could not be read.'.format(
+        'Would update' if dry_run else 'Updated', migrated, current, failed))
 
 
 def _update_template(template_path):
@@ -58,7 +78,7 @@ def _update_template(template_path):
 
     if templates_path:
         # Now need to find the templates definition of that zip file and locate it in the file system so that it can be
-        settings = get_configuration()
+        settings = copy_configuration()
 
         # Override the configuration details with the new template path.  This should probably be handled by the
         # publishing plugin, but for now this will work
@@ -1,13 +1,111 @@
+"""
+Migrations that update the log files between file versions.  Each migration module declares the file version that it
+produces (FILE_VERSION), the file suffixes that it handles (SUFFIXES) and a migrate(post, file_path, search_path)
+function that updates the front matter post in place.  A file is loaded once, provided to each of the migrations whose
+version is newer than the version of the file, and written once if its content changed.
+"""
+import concurrent.futures
+import functools
+import traceback
+from collections import namedtuple
+
+import frontmatter
+from semantic_version import Version
+
 from autology.commands.subcommands.updaters import update_0_1_0_agent_information
 from autology.commands.subcommands.updaters import update_0_2_0_date_time_values
+from autology.utilities import log_file
+from autology.utilities.log_file import MetaKeys
+
+# Migrations in the order that they are applied
+MIGRATIONS = sorted([update_0_1_0_agent_information, update_0_2_0_date_time_values],
+                    key=lambda migration: migration.FILE_VERSION)
+
+# Version of the files that do not define the file version they were written with
+UNVERSIONED = log_file.UNVERSIONED
+
+# Result of migrating a file.  migrations is the list of the versions that were applied, and error is the formatted
+# exception if the file could not be migrated.
+MigrationResult = namedtuple('MigrationResult', 'file from_version migrations written error')
+
+
+def get_file_version(metadata):
+    """Provide the file version that is defined in the front matter of a log file."""
+    try:
+        return Version.coerce(str(metadata[MetaKeys.AGENT_DEFINITION][MetaKeys.Agent.FILE_VERSION]))
+    except (KeyError, TypeError, ValueError):
+        return UNVERSIONED
+
+
+def required_migrations(file_path, version):
+    """Provide the migrations that must be applied to a file of the suffix and version."""
+    return [migration for migration in MIGRATIONS
+            if file_path.suffix in migration.SUFFIXES and version < migration.FILE_VERSION]
+
+
+def migrate_file(search_path, file_path, dry_run=False):
+    """
+    Load the file, apply each of the migrations that it requires and write it out if it was modified.
+    :param search_path: log directory that contains the file.
+    :param file_path: path to the log file.
+    :param dry_run: determine the migrations that would be applied without modifying the file.
+    :return: MigrationResult
+    """
+    if not any(file_path.suffix in migration.SUFFIXES for migration in MIGRATIONS):
+        return MigrationResult(file_path, None, [], False, None)
+
+    try:
+        # Files that are already current are found by reading their front matter, without loading the whole file.
+        version = log_file.sniff_file_version(file_path)
+        if version is not None and not required_migrations(file_path, version):
+            return MigrationResult(file_path, version, [], False, None)
+
+        original_content = file_path.read_text()
+        post = frontmatter.loads(original_content)
+
+        version = get_file_version(post.metadata)
+        migrations = required_migrations(file_path, version)
+        if dry_run or not migrations:
+            return MigrationResult(file_path, version, [migration.FILE_VERSION for migration in migrations], False,
+                                   None)
+
+        for migration in migrations:
+            migration.migrate(post, file_path, search_path)
+
+        content = frontmatter.dumps(post)
+        written = content != original_content
+        if written:
+            file_path.write_text(content)
+
+        return MigrationResult(file_path, version, [migration.FILE_VERSION for migration in migrations], written, None)
+    except Exception:
+        return MigrationResult(file_path, None, [], False, traceback.format_exc())
+
+
+def migrate_files(search_path, files, jobs=1, dry_run=False):
+    """
+    Generator that migrates each of the files, yielding the results in the same order as the files.
+    :param search_path: log directory that contains the files.
+    :param files: paths of the log files.
+    :param jobs: number of processes that will migrate the files.
+    :param dry_run: determine the migrations that would be applied without modifying the files.
+    """
+    migrate = functools.partial(migrate_file, search_path, dry_run=dry_run)
+
+    if jobs <= 1:
+        yield from map(migrate, files)
+        return
+
+    files = list(files)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(migrate, files, chunksize=max(1, min(64, len(files) // (jobs * 4))))
 
 
 def update_files(search_path, file_path):
     """
-    Run the updates in order so that they will update the log files in place.
-    :param search_path:
-    :param file_path:
-    :return:
+    Run the migrations that the file requires so that it will be updated in place.
+    :param search_path: log directory that contains the file.
+    :param file_path: path to the log file.
+    :return: MigrationResult
     """
-    update_0_1_0_agent_information.add_agent_information(search_path, file_path)
-    update_0_2_0_date_time_values.change_date_time_values(search_path, file_path)
+    return migrate_file(search_path, file_path)
@@ -1,9 +1,12 @@
 """
-Log file updater that will translate all of the time and end_time values into timezone aware data values.
+Log file updater that will add the agent information to the front matter of the log files.
 """
-import frontmatter
+from semantic_version import Version
+
 from autology.utilities.log_file import MetaKeys
 FILE_VERSION_INFORMATION = '0.1.0'
+FILE_VERSION = Version.coerce(FILE_VERSION_INFORMATION)
+SUFFIXES = ('.md',)
 
 
 DEFAULT_AGENT_DEFINTION = {
@@ -13,38 +16,24 @@ DEFAULT_AGENT_DEFINTION = {
 }
 
 
-def add_agent_information(search_path, file_component):
+def migrate(post, file_path, search_path):
     """
-    Will check to see if the file needs to be processed before updating the values.  Will then populate the new agent
-    information with what should be used in the future.
-    :param search_path:
-    :param file_component:
-    :return:
+    Populate the agent information that should be used in the future, filling in the values that are missing.
+    :param post: front matter post loaded from the file, updated in place.
+    :param file_path: path to the log file.
+    :param search_path: log directory that contains the file.
     """
-    if file_component.suffix != '.md':
-        return
-
-    entry = frontmatter.load(file_component)
-
-    write_file = False
-
     # Check to see if the agent information has been defined in the log file
-    if MetaKeys.AGENT_DEFINITION not in entry.metadata:
-        entry.metadata[MetaKeys.AGENT_DEFINITION] = dict(DEFAULT_AGENT_DEFINTION)
-        write_file = True
+    if MetaKeys.AGENT_DEFINITION not in post.metadata:
+        post.metadata[MetaKeys.AGENT_DEFINITION] = dict(DEFAULT_AGENT_DEFINTION)
     else:
-        agent_definition = entry.metadata[MetaKeys.AGENT_DEFINITION]
+        agent_definition = post.metadata[MetaKeys.AGENT_DEFINITION]
         try:
             for key in (MetaKeys.Agent.NAME, MetaKeys.Agent.VERSION, MetaKeys.Agent.FILE_VERSION):
-                write_file = write_file or _check_set_value(agent_definition, key)
+                _check_set_value(agent_definition, key)
 
         except (AttributeError, TypeError):
-            entry.metadata[MetaKeys.AGENT_DEFINITION] = DEFAULT_AGENT_DEFINTION
-            write_file = True
-
-    if write_file:
-        with open(file_component, "w") as output_file:
-            output_file.write(frontmatter.dumps(entry))
+            post.metadata[MetaKeys.AGENT_DEFINITION] = dict(DEFAULT_AGENT_DEFINTION)
 
 
 def _check_set_value(destination, key):
@@ -1,12 +1,11 @@
 """
 Log file updater that will translate all of the time and end_time values into timezone aware data values.
 """
-import frontmatter
-import tzlocal
 import logging
 
 from semantic_version import Version
 
+from autology.utilities.datetimes import local_timezone
 from autology.utilities.log_file import MetaKeys
 
 import datetime
@@ -15,45 +14,30 @@ import pytz
 logger = logging.getLogger(__name__)
 DEFAULT_EVENT_LENGTH = 60  # minutes
 FILE_VERSION_INFORMATION = Version.coerce('0.2.0')
+FILE_VERSION = FILE_VERSION_INFORMATION
+SUFFIXES = ('.md',)
 
 
-def change_date_time_values(search_path, file_component):
+def migrate(post, file_path, search_path):
     """
-    Will check to see if the file needs to be processed before updating the values.  Will then populate the new agent
-    information with what should be used in the future.
-    :param search_path:
-    :param file_component:
-    :return:
+    Translate the time and end_time values of the post into timezone aware values, using the date of the directory that
+    contains the file.
+    :param post: front matter post loaded from the file, updated in place.
+    :param file_path: path to the log file.
+    :param search_path: log directory that contains the file.
     """
-    if file_component.suffix != '.md':
-        return
-
-    entry = frontmatter.load(file_component)
-
-    # Can assume that the entry has the agent definition data because it passed through the previous values
-    agent_definition = entry[MetaKeys.AGENT_DEFINITION]
-    version = Version.coerce(agent_definition[MetaKeys.Agent.FILE_VERSION])
-
-    if version >= FILE_VERSION_INFORMATION:
-        return
+    year, month, day = file_path.parent.relative_to(search_path).parts
 
-    year, month, day = file_component.parent.relative_to(search_path).parts
-
-    logger.info('Processing: {} {}/{}/{}'.format(file_component, year, month, day))
+    logger.info('Processing: {} {}/{}/{}'.format(file_path, year, month, day))
 
     date = datetime.date(int(year), int(month), int(day))
 
-    local_timezone = tzlocal.get_localzone()
-
-    start_date = _get_start_time(date, entry.metadata, file_component, tzinfo=local_timezone)
-    end_time = _get_end_time(start_date, entry.metadata, tzinfo=local_timezone)
-
-    entry.metadata[MetaKeys.TIME] = start_date
-    entry.metadata[MetaKeys.END_TIME] = end_time
-    entry.metadata[MetaKeys.AGENT_DEFINITION][MetaKeys.Agent.FILE_VERSION] = "{}".format(FILE_VERSION_INFORMATION)
+    start_date = _get_start_time(date, post.metadata, file_path, tzinfo=local_timezone())
+    end_time = _get_end_time(start_date, post.metadata, tzinfo=local_timezone())
 
-    with open(file_component, "w") as output_file:
-        output_file.write(frontmatter.dumps(entry))
+    post.metadata[MetaKeys.TIME] = start_date
+    post.metadata[MetaKeys.END_TIME] = end_time
+    post.metadata[MetaKeys.AGENT_DEFINITION][MetaKeys.Agent.FILE_VERSION] = "{}".format(FILE_VERSION_INFORMATION)
 
 
 def _get_start_time(date, front_matter, file_path=None, tzinfo=pytz.utc):
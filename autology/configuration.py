@@ -12,6 +12,9 @@ import pathlib
 
 _configuration_file_location = pathlib.Path('/')
 
+# Read only snapshot of the settings object, rebuilt the next time it is requested after the settings are modified.
+_configuration_snapshot = None
+
 # This is the default settings object. It is in dictionary form, but will be accessed using object notation once the
 # configuration file has been loaded.
 #
@@ -20,6 +23,13 @@ _settings = {
     'processing': {
         # List of log directories that should be processed in order to find content
         'inputs': ['log'],
+
+        # Directory (relative to the configuration file) that will store the caches built up between executions
+        'cache': '.autology',
+
+        # Maximum number of loaded log files that are kept in memory while the files are sorted into date order.  Files
+        # that are not kept in memory are loaded again when they are processed.  null will keep all of them.
+        'retained_files': None,
     },
     'site': {
         # This is the default title of the site
@@ -36,13 +46,23 @@ def get_configuration_root():
     return _configuration_file_location.parent
 
 
+def get_cache_directory():
+    """Provides the location of the directory that caches are stored in, creating it if necessary."""
+    cache_directory = get_configuration_root() / get_configuration().processing.cache
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    return cache_directory
+
+
 def add_default_configuration(key, configuration):
     """
     Method call that will add default settings, should only be called before initialize event is fired off
     :param key: key to namespace the configuration settings away
     :param configuration:
     """
+    global _configuration_snapshot
+
     _settings[key] = configuration
+    _configuration_snapshot = None
 
 
 def load_configuration_file(file_name):
@@ -51,9 +71,10 @@ def load_configuration_file(file_name):
     :param file_name: filename to open and load settings from
     :return: object containing settings.
     """
-    global _settings, _configuration_file_location
+    global _settings, _configuration_file_location, _configuration_snapshot
 
     _configuration_file_location = pathlib.Path(file_name).resolve()
+    _configuration_snapshot = None
 
     try:
         with open(file_name, 'r') as configuration_file:
@@ -63,14 +84,57 @@ def load_configuration_file(file_name):
     except FileNotFoundError:
         pass
 
-    return munch.Munch.fromDict(_settings)
+    return get_configuration()
 
 
 def get_configuration():
-    """Returns objects with unmodified settings."""
+    """
+    Returns a read only object containing the settings.  The same object is provided until the settings are modified
+    by add_default_configuration or load_configuration_file.
+    """
+    global _configuration_snapshot
+
+    if _configuration_snapshot is None:
+        _configuration_snapshot = _freeze(_settings)
+
+    return _configuration_snapshot
+
+
+def copy_configuration():
+    """Returns a modifiable copy of the settings, modifications are not applied to the application's settings."""
     return munch.Munch.fromDict(_settings)
 
 
+class FrozenMunch(munch.Munch):
+    """Munch object that cannot be modified after it has been created."""
+
+    def __init__(self, items=()):
+        dict.__init__(self, items)
+
+    def __getattr__(self, key):
+        # Only called when the attribute isn't found on the object, so go straight to the dictionary values.
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Configuration is read only, use copy_configuration() to create a modifiable copy')
+
+    __setattr__ = __setitem__ = __delattr__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+def _freeze(value):
+    """Recursively translate dictionaries and lists into read only munch objects and tuples."""
+    if isinstance(value, dict):
+        return FrozenMunch((key, _freeze(item)) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
 def dump_configuration(configuration_file, configuration=None):
     """
     Dump the configuration object to the provided file.
@@ -79,7 +143,7 @@ def dump_configuration(configuration_file, configuration=None):
     :return:
     """
     if configuration is None:
-        configuration = get_configuration()
+        configuration = copy_configuration()
 
     with open(configuration_file, 'w') as configuration_file:
         safe_dump(configuration.toDict(), configuration_file, default_flow_style=False)
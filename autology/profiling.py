@@ -0,0 +1,271 @@
+"""
+Instrumentation that measures where the time of a command is spent, enabled with the global --profile option.
+
+When enabled, the topic dispatch, the file processors that are registered and the publishing functions are wrapped with
+timers, so there is no cost when profiling is disabled.  The files that are loaded by other processes are timed by the
+processes, and their times are recorded when the loaded files are received.  The timings are inclusive: the time of a topic includes the
+time of its listeners, and a listener includes the time of any topics that it publishes.  Templates are rendered by a
+pool of threads, so their times are summed across the threads and can be larger than the time of the command.
+"""
+import contextlib
+import cProfile
+import threading
+import time
+
+from autology import publishing, topics
+from autology.utilities import log_file
+
+# Dictionary of (category, name) to [calls, total seconds], None when profiling is disabled.
+_timings = None
+_timings_lock = threading.Lock()
+
+_start_time = None
+_profiler = None
+
+# Original functions that were replaced by the timed versions, restored by disable()
+_originals = []
+
+
+def is_enabled():
+    """Determine if the timings are being recorded."""
+    return _timings is not None
+
+
+def enable(profile_file=None):
+    """
+    Start recording the timings.  Must be called before the plugins are loaded so that the file processors that they
+    register are timed.
+    :param profile_file: when provided, the command is also profiled with cProfile and the statistics are written to
+    this file by report().
+    """
+    global _timings, _start_time, _profiler
+
+    if _timings is not None:
+        return
+
+    _timings = {}
+    _start_time = time.perf_counter()
+
+    _replace(topics.PubSubEnumMixin, 'publish', _timed_topic_publish)
+    _replace(publishing, '_publish', _timed_function('publish', publishing._publish, _publish_name))
+    _replace(publishing, '_render_content', _timed_function('template', publishing._render_content,
+                                                            lambda name, *args: name))
+    _replace(publishing, '_write_output', _timed_write_output)
+    _replace(publishing, '_copy_output', _timed_copy_output)
+    _replace(log_file, 'find_log_files', _timed_find_log_files)
+    _replace(log_file, '_loaded_chunk', _timed_loaded_chunk)
+
+    # Wrap the file processors that have already been registered, and the ones that are registered later.
+    _replace(log_file, 'register_file_processor', _register_timed_file_processor)
+    for file_processor in list(log_file._file_processors.values()):
+        _register_timed_file_processor(*file_processor)
+
+    if profile_file is not None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def disable():
+    """Stop recording the timings and restore the functions that were instrumented."""
+    global _timings, _profiler
+
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+
+    for file_processor in list(log_file._file_processors.values()):
+        log_file.register_file_processor(file_processor.mime_type, _unwrap(file_processor.load),
+                                         _unwrap(file_processor.write))
+
+    _timings = None
+
+
+def record(category, name, elapsed):
+    """Add a call that took elapsed seconds to the timings, ignored when profiling is disabled."""
+    if _timings is None:
+        return
+
+    with _timings_lock:
+        timing = _timings.setdefault((category, name), [0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+
+
+@contextlib.contextmanager
+def measure(category, name):
+    """Context manager that records the time taken by the block."""
+    if _timings is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(category, name, time.perf_counter() - start_time)
+
+
+def get_timings():
+    """Provide the dictionary of (category, name) to (calls, total seconds) that have been recorded."""
+    with _timings_lock:
+        return {key: tuple(value) for key, value in (_timings or {}).items()}
+
+
+def report(profile_file=None, output=print):
+    """
+    Print the timings grouped by category, slowest first.
+    :param profile_file: file that the cProfile statistics are written to when they were collected.
+    :param output: function that is provided each line of the table.
+    """
+    if _timings is None:
+        return
+
+    if _profiler is not None:
+        _profiler.disable()
+        if profile_file is not None:
+            _profiler.dump_stats(profile_file)
+
+    timings = get_timings()
+    name_width = max([len(name) for _, name in timings] + [20]) + 2
+
+    output('')
+    output('Profile: {:.3f} seconds'.format(time.perf_counter() - _start_time))
+    output('{:<16}{:<{width}}{:>8}{:>12}{:>12}'.format('category', 'name', 'calls', 'total sec', 'mean ms',
+                                                      width=name_width))
+
+    for category in sorted({category for category, _ in timings}):
+        category_timings = sorted(((name, calls, total) for (timing_category, name), (calls, total) in timings.items()
+                                   if timing_category == category), key=lambda timing: timing[2], reverse=True)
+        for name, calls, total in category_timings:
+            output('{:<16}{:<{width}}{:>8}{:>12.3f}{:>12.3f}'.format(category, name, calls, total,
+                                                                    total / calls * 1000, width=name_width))
+
+    if _profiler is not None and profile_file is not None:
+        output('cProfile statistics written to: {}'.format(profile_file))
+
+
+def _replace(owner, name, replacement):
+    """Replace the attribute of the owner, keeping the original so that it can be restored."""
+    _originals.append((owner, name, getattr(owner, name)))
+    setattr(owner, name, replacement)
+
+
+def _callable_name(function):
+    """Name of the module and function, used to identify the listeners."""
+    return '{}.{}'.format(getattr(function, '__module__', '?'), getattr(function, '__qualname__', repr(function)))
+
+
+def _timed_function(category, function, name_function):
+    """Wrap the function so that each call is recorded with the name provided by the arguments of the call."""
+    def _timed(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(category, name_function(*args, **kwargs), time.perf_counter() - start_time)
+
+    return _timed
+
+
+def _publish_name(*args, **kwargs):
+    return '.'.join(str(arg) for arg in args)
+
+
+def _timed_topic_publish(topic, **kwargs):
+    """Deliver the message to the listeners of the topic, recording the time taken by the topic and each listener."""
+    start_time = time.perf_counter()
+
+    for listener in topics._listeners.get(topic, ()):
+        listener_start_time = time.perf_counter()
+        listener(**kwargs)
+        record('listener', _callable_name(listener), time.perf_counter() - listener_start_time)
+
+    record('topic', '{}.{}'.format(type(topic).__name__, topic.name), time.perf_counter() - start_time)
+
+
+def _timed_write_output(output_file, content):
+    """Record the time taken to write the output files, separating the files that were unchanged."""
+    start_time = time.perf_counter()
+    written = _originals_lookup(publishing, '_write_output')(output_file, content)
+    record('write', 'written' if written else 'unchanged', time.perf_counter() - start_time)
+
+    return written
+
+
+def _timed_copy_output(output_file, source):
+    """Record the time taken to copy the files into the output directory, separating the files that were unchanged."""
+    start_time = time.perf_counter()
+    copied = _originals_lookup(publishing, '_copy_output')(output_file, source)
+    record('write', 'copied' if copied else 'copy unchanged', time.perf_counter() - start_time)
+
+    return copied
+
+
+def _timed_find_log_files(directories):
+    """
+    Record the time taken to find the log files.  The files are found while they are iterated over, so the time taken
+    to find each of them is added together and recorded once the iteration has finished.
+    """
+    found_files = _originals_lookup(log_file, 'find_log_files')(directories)
+    elapsed = 0.0
+    try:
+        while True:
+            start_time = time.perf_counter()
+            try:
+                found_file = next(found_files)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start_time
+
+            yield found_file
+    finally:
+        record('phase', 'find log files', elapsed)
+
+
+def _timed_loaded_chunk(chunk, loaded_chunk, *args):
+    """Record the time taken by the loading processes to load each of the files in the chunk."""
+    for (_, _, file_processor, _, _), (_, _, elapsed) in zip(chunk, loaded_chunk):
+        record('file processor', '{} load'.format(file_processor.mime_type), elapsed)
+
+    return _originals_lookup(log_file, '_loaded_chunk')(chunk, loaded_chunk, *args)
+
+
+def _originals_lookup(owner, name):
+    """Find the function that was replaced."""
+    for original_owner, original_name, original in _originals:
+        if original_owner is owner and original_name == name:
+            return original
+
+    raise KeyError(name)
+
+
+class _TimedFileFunction:
+    """File processor function that records its time, a class so that it can be sent to the loading processes."""
+
+    def __init__(self, name, function):
+        self.name = name
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return self.function(*args, **kwargs)
+        finally:
+            record('file processor', self.name, time.perf_counter() - start_time)
+
+
+def _unwrap(function):
+    return function.function if isinstance(function, _TimedFileFunction) else function
+
+
+def _register_timed_file_processor(mime_type, file_loader, file_writer):
+    """Register the file processor with functions that record the time taken to load and write each file."""
+    _originals_lookup(log_file, 'register_file_processor')(
+        mime_type,
+        _TimedFileFunction('{} load'.format(mime_type), _unwrap(file_loader)),
+        _TimedFileFunction('{} write'.format(mime_type), _unwrap(file_writer)))
@@ -1,24 +1,66 @@
 """
 Provides wrapper around common publishing functionality.
 """
+import concurrent.futures
+import hashlib
+import json
 import pathlib
 import logging
+import shutil
+import threading
 
 import markdown
-import shutil
 import yaml
 from dict_recursive_update import recursive_update
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, meta, select_autoescape
 
 from autology import topics
-from autology.configuration import add_default_configuration, get_configuration
+from autology.configuration import add_default_configuration, get_configuration, get_cache_directory
+from autology.utilities.cache import ContentCache, content_key
+from autology.utilities.dependencies import DependencyGraph
 
 logger = logging.getLogger(__name__)
 _environment = None
 _output_path = None
-_markdown_conversion = None
 _template_configuration = {}
 
+# Directory in the cache directory that stores the compiled templates between executions
+_BYTECODE_DIRECTORY = 'templates'
+
+# Markdown conversion objects are not thread safe, so each of the rendering threads creates its own.
+_markdown_conversion = threading.local()
+
+# Cache of the HTML that has been converted from markdown content, keyed by the content and the markdown settings.
+_MARKDOWN_CACHE_FILE = 'markdown.sqlite'
+_markdown_cache = None
+_markdown_settings = b''
+
+# Pool of threads that render the published templates, and the pages that have been queued.  When there is not a pool,
+# the templates are rendered when they are published.
+_render_queue = None
+_pending_renders = []
+
+# Manifest of the content hashes of the files in the output directory, files are only written when their content has
+# changed.  The statistics count the files that were written or skipped in this execution.
+_MANIFEST_FILE = 'output_manifest.json'
+_output_manifest = {}
+_output_statistics = {'written': 0, 'skipped': 0, 'bytes_written': 0}
+_output_lock = threading.Lock()
+
+# Number of bytes that are read at a time when hashing the files that are copied into the output directory
+_COPY_BLOCK_SIZE = 1024 * 1024
+
+# Dependency graph that is used to determine which of the outputs need to be rendered, None renders all of them.
+_dependencies = None
+
+# When rendering is deferred, the published templates are recorded instead of being rendered, and are rendered when
+# they are requested.  The outputs are recorded into a new dictionary while processing, which replaces the outputs that
+# can be rendered once the processing has finished.  Rendered content is kept along with the dependency record that
+# it was rendered from, and is rendered again when the record changes.
+_recording_outputs = None
+_deferred_outputs = {}
+_deferred_renders = {}
+
 
 def load():
     """
@@ -26,13 +68,24 @@ def load():
     :return:
     """
     topics.Application.INITIALIZE.subscribe(_initialize)
+    topics.Application.FINALIZE.subscribe(_finalize)
     topics.Processing.END.subscribe(_copy_static_files)
 
     add_default_configuration('publishing',
                               {
                                   'templates': 'templates',
                                   'output': 'output',
-                                  'url_root': '/'
+                                  'url_root': '/',
+                                  'render_workers': 4,
+                                  'bytecode_cache': True,
+                                  'markdown': {
+                                      # Names of the markdown extensions and the settings provided to them
+                                      'extensions': [],
+                                      'extension_configs': {},
+
+                                      # Maximum bytes of converted markdown stored in the cache directory, 0 disables
+                                      'cache_size': 64 * 1024 * 1024,
+                                  },
                               })
 
 
@@ -41,7 +94,8 @@ def _initialize():
     Initialize the jinja environment.
     :return:
     """
-    global _environment, _output_path, _markdown_conversion, _template_configuration
+    global _environment, _output_path, _template_configuration, _render_queue, _output_manifest, _markdown_cache, \
+        _markdown_settings
     configuration_settings = get_configuration()
 
     # Load up and store the configuration that is defined in the template files
@@ -50,23 +104,208 @@ def _initialize():
         with template_configuration_path.open() as tc_file:
             _template_configuration = yaml.load(tc_file)
 
-    # Create markdown conversion object
-    _markdown_conversion = markdown.Markdown()
-
     # Load the same jinja environment for everyone
-    _environment = Environment(
-        loader=FileSystemLoader(configuration_settings.publishing.templates),
-        autoescape=select_autoescape()
-    )
-
-    # Load up the custom filters
-    _environment.filters['autology_url'] = url_filter
-    _environment.filters['markdown'] = markdown_filter
+    bytecode_directory = None
+    if configuration_settings.publishing.bytecode_cache:
+        bytecode_directory = get_cache_directory() / _BYTECODE_DIRECTORY
+    _environment = create_environment(configuration_settings.publishing.templates, bytecode_directory)
 
     # Verify that the output directory exists before starting to write out the content
     _output_path = pathlib.Path(configuration_settings.publishing.output)
     _output_path.mkdir(exist_ok=True)
 
+    manifest_path = get_cache_directory() / _MANIFEST_FILE
+    if manifest_path.exists():
+        try:
+            with manifest_path.open() as manifest_file:
+                _output_manifest = json.load(manifest_file)
+        except ValueError:
+            logger.warning('Cannot read output manifest: {}'.format(manifest_path))
+
+    markdown_configuration = configuration_settings.publishing.markdown
+    _markdown_settings = json.dumps({
+        'version': markdown.__version__,
+        'extensions': markdown_configuration.extensions,
+        'extension_configs': markdown_configuration.extension_configs,
+    }, sort_keys=True, default=str).encode()
+
+    if markdown_configuration.cache_size > 0:
+        _markdown_cache = ContentCache(get_cache_directory() / _MARKDOWN_CACHE_FILE, markdown_configuration.cache_size)
+
+    if configuration_settings.publishing.render_workers > 0:
+        _render_queue = concurrent.futures.ThreadPoolExecutor(
+            max_workers=configuration_settings.publishing.render_workers)
+
+
+def _finalize():
+    """
+    Wait for all of the queued templates to be rendered, shut down the rendering threads and save the manifest and
+    markdown cache.
+    """
+    global _render_queue, _markdown_cache
+
+    if _render_queue is not None:
+        try:
+            flush()
+        finally:
+            _render_queue.shutdown()
+            _render_queue = None
+
+    if _markdown_cache is not None:
+        _markdown_cache.close()
+        _markdown_cache = None
+
+    if _output_statistics['written']:
+        with (get_cache_directory() / _MANIFEST_FILE).open('w') as manifest_file:
+            json.dump(_output_manifest, manifest_file)
+
+
+def create_environment(template_path, bytecode_directory=None):
+    """
+    Create a jinja environment that loads the templates from the template path, and provides the custom filters.
+    :param template_path: directory containing the templates.
+    :param bytecode_directory: directory that the compiled templates are stored in between executions, None to compile
+    the templates each time that they are loaded.
+    """
+    bytecode_cache = None
+    if bytecode_directory is not None:
+        bytecode_directory = pathlib.Path(bytecode_directory)
+        bytecode_directory.mkdir(parents=True, exist_ok=True)
+
+        # Compiled templates are stored with the hash of their source, so modified templates are compiled again.
+        bytecode_cache = FileSystemBytecodeCache(str(bytecode_directory))
+
+    environment = Environment(
+        loader=FileSystemLoader(str(template_path)),
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache
+    )
+
+    # Load up the custom filters
+    environment.filters['autology_url'] = url_filter
+    environment.filters['markdown'] = markdown_filter
+
+    return environment
+
+
+def compile_templates():
+    """
+    Load all of the templates that are defined in the template configuration, and the templates that they reference,
+    so that the compiled templates are stored in the bytecode cache.
+    :return: list of the names of the templates that were compiled.
+    """
+    return _compile_templates(_environment, _template_configuration)
+
+
+def _compile_templates(environment, template_configuration):
+    """Load all of the templates that are used by the template configuration into the environment."""
+    pending = list(_defined_templates(template_configuration.get('templates', {})))
+    compiled = []
+
+    while pending:
+        name = pending.pop()
+        if name in compiled:
+            continue
+
+        environment.get_template(name)
+        compiled.append(name)
+
+        source, _, _ = environment.loader.get_source(environment, name)
+        pending.extend(reference for reference in meta.find_referenced_templates(environment.parse(source))
+                       if reference)
+
+    return compiled
+
+
+def _defined_templates(template_definitions):
+    """Generator that yields the names of all of the templates in the template definitions."""
+    if 'template' in template_definitions:
+        yield str(template_definitions['template'])
+
+    for value in template_definitions.values():
+        if isinstance(value, dict):
+            yield from _defined_templates(value)
+
+
+def get_output_statistics():
+    """Provide the number of output files that were written, skipped because they were unchanged, and bytes written."""
+    return dict(_output_statistics)
+
+
+def _write_output(output_file, content):
+    """
+    Write the content to the file relative to the output path, unless the file already contains the content.
+    :param output_file: path relative to the output directory.
+    :param content: bytes that will be stored in the file.
+    :return: True if the file was written.
+    """
+    key = pathlib.Path(output_file).as_posix()
+    destination = _output_path / output_file
+    digest = hashlib.sha256(content).hexdigest()
+
+    if _is_unchanged(key, destination, digest):
+        return False
+
+    # Verify that the path is possible and write out the file
+    destination.parent.mkdir(exist_ok=True, parents=True)
+    destination.write_bytes(content)
+
+    _record_output(key, digest, len(content))
+    return True
+
+
+def _copy_output(output_file, source):
+    """
+    Copy the file and its permission bits to the file relative to the output path, unless the file already contains
+    the content.  The file is read in blocks so that large files are not held in memory.
+    :param output_file: path relative to the output directory.
+    :param source: path of the file that will be copied.
+    :return: True if the file was copied.
+    """
+    key = pathlib.Path(output_file).as_posix()
+    destination = _output_path / output_file
+
+    content_hash = hashlib.sha256()
+    with open(str(source), 'rb') as source_content:
+        for block in iter(lambda: source_content.read(_COPY_BLOCK_SIZE), b''):
+            content_hash.update(block)
+    digest = content_hash.hexdigest()
+
+    if _is_unchanged(key, destination, digest):
+        return False
+
+    destination.parent.mkdir(exist_ok=True, parents=True)
+    shutil.copy(str(source), str(destination))
+
+    _record_output(key, digest, destination.stat().st_size)
+    return True
+
+
+def _is_unchanged(key, destination, digest):
+    """
+    Compare the digest of the content against the manifest, checking the size of the file in case it was modified
+    outside of the application.
+    """
+    stored = _output_manifest.get(key)
+    if stored is not None and stored[0] == digest:
+        try:
+            if destination.stat().st_size == stored[1]:
+                with _output_lock:
+                    _output_statistics['skipped'] += 1
+                return True
+        except FileNotFoundError:
+            pass
+
+    return False
+
+
+def _record_output(key, digest, size):
+    """Store the digest of the file that was written in the manifest."""
+    with _output_lock:
+        _output_manifest[key] = [digest, size]
+        _output_statistics['written'] += 1
+        _output_statistics['bytes_written'] += size
+
 
 def publish(*args, context=None, **kwargs):
     """
@@ -76,20 +315,176 @@ def publish(*args, context=None, **kwargs):
     :param kwargs:
     :return:
     """
+    # Reports import this function directly, so the implementation is looked up when called to allow it to be
+    # instrumented by autology.profiling.
+    return _publish(*args, context=context, **kwargs)
+
+
+def _publish(*args, context=None, **kwargs):
+    """Render the template, or record it when rendering is deferred, providing the path of the output file."""
     context = _build_context(context=context, **kwargs)
     template_definition = _find_template(*args)
 
-    # Load the template and render to the destination file defined in the template_definition
-    root_template = _environment.get_template(str(template_definition['template']))
+    template_name = str(template_definition['template'])
     output_file = template_definition['destination'].format(**context)
-    output_content = root_template.render(context)
-    output_file = _output_path / output_file
 
-    # Verify that the path is possible and write out the file
-    output_file.parent.mkdir(exist_ok=True, parents=True)
-    output_file.write_text(output_content)
+    if _recording_outputs is not None:
+        record = _dependencies.check(output_file, template_name, context)[1] if _dependencies is not None else None
+        _recording_outputs[pathlib.Path(output_file).as_posix()] = (template_name, _snapshot_context(context), record)
+        return pathlib.Path(output_file)
+
+    # Outputs whose inputs have not changed since they were last rendered do not need to be rendered again
+    if _dependencies is not None:
+        reasons, record = _dependencies.check(output_file, template_name, context)
+        _dependencies.record(output_file, record, reasons)
+        if not reasons:
+            return pathlib.Path(output_file)
+
+    # Queue up the rendering of the template, the dictionaries of the context are copied so that the caller can modify
+    # them while the template is rendered.
+    if _render_queue is not None:
+        _queue_render(template_name, _snapshot_context(context), output_file)
+    else:
+        _render(template_name, context, output_file)
 
-    return output_file.relative_to(_output_path)
+    return pathlib.Path(output_file)
+
+
+def _snapshot_context(value, copies=None):
+    """
+    Copy the dictionaries that are contained in the context, other values are shared with the published context.
+    :param value: the context, or a value contained within it.
+    :param copies: the copies that have been made of each dictionary, keyed by the identifier of the dictionary.
+    :return: the copied value.
+    """
+    if type(value) is not dict:
+        return value
+
+    if copies is None:
+        copies = {}
+
+    copied = copies.get(id(value))
+    if copied is None:
+        copied = copies[id(value)] = {}
+        for key, item in value.items():
+            copied[key] = _snapshot_context(item, copies)
+
+    return copied
+
+
+def _render(template_name, context, output_file):
+    """Load the template and render to the destination file relative to the output path."""
+    _write_output(output_file, _render_content(template_name, context))
+
+
+def _render_content(template_name, context):
+    """Load the template and render the context, providing the encoded content."""
+    return _environment.get_template(template_name).render(context).encode()
+
+
+def _queue_render(template_name, context, output_file):
+    """Add the template to the render queue, waiting for the oldest renders when too many are pending."""
+    global _pending_renders
+
+    _pending_renders.append(_render_queue.submit(_render, template_name, context, output_file))
+
+    # Limit the number of contexts that are held in memory while waiting to be rendered, and raise any errors as soon
+    # as they are found.
+    limit = get_configuration().publishing.render_workers * 16
+    if len(_pending_renders) > limit:
+        still_pending = []
+        for future in _pending_renders:
+            if future.done():
+                future.result()
+            else:
+                still_pending.append(future)
+
+        _pending_renders = still_pending
+        while len(_pending_renders) > limit:
+            _pending_renders.pop(0).result()
+
+
+def flush():
+    """Wait for all of the queued templates to be rendered, raising the first error that occurred while rendering."""
+    global _pending_renders
+
+    pending_renders, _pending_renders = _pending_renders, []
+    for future in pending_renders:
+        future.result()
+
+
+def defer_rendering():
+    """
+    Record all of the templates that are published from now on instead of rendering them, until finish_deferred() is
+    called.  The recorded outputs are rendered with render_deferred() when they are requested.
+    """
+    global _recording_outputs
+    _recording_outputs = {}
+
+
+def finish_deferred():
+    """Replace the outputs that can be rendered with the outputs that were recorded since defer_rendering()."""
+    global _recording_outputs, _deferred_outputs
+
+    _deferred_outputs, _recording_outputs = _recording_outputs, None
+
+    # Forget the rendered content of the outputs that are no longer published
+    for key in list(_deferred_renders):
+        if key not in _deferred_outputs:
+            _deferred_renders.pop(key, None)
+
+
+def is_deferred(output_file):
+    """Determine if the output file was published while rendering was deferred."""
+    return pathlib.Path(output_file).as_posix() in _deferred_outputs
+
+
+def render_deferred(output_file):
+    """
+    Render an output that was published while rendering was deferred, and write it to the output directory.  The
+    content is only rendered again when the inputs of the output have changed.
+    :param output_file: path of the output file relative to the output directory.
+    :return: the rendered content, None if the output was not published.
+    """
+    key = pathlib.Path(output_file).as_posix()
+    deferred = _deferred_outputs.get(key)
+    if deferred is None:
+        return None
+
+    template_name, context, record = deferred
+    rendered = _deferred_renders.get(key)
+    if rendered is not None and record is not None and rendered[0] == record:
+        return rendered[1]
+
+    content = _render_content(template_name, context)
+    _write_output(key, content)
+    _deferred_renders[key] = (record, content)
+
+    return content
+
+
+def track_dependencies(path, entry_digest=None, force=False, explain=None):
+    """
+    Record the inputs of each of the published outputs, and only render the outputs whose inputs have changed since
+    the previous execution.  Must be called after the initialize topic has been published.
+    :param path: file that the dependency graph is stored in.
+    :param entry_digest: callable that will provide the content hash of a log file.
+    :param force: render all of the outputs regardless of the previous execution.
+    :param explain: callable that is provided the output file and the reasons each time an output is rendered.
+    :return: the dependency graph, which must be saved once all of the outputs have been published.
+    """
+    global _dependencies
+
+    configuration = get_configuration()
+    _dependencies = DependencyGraph(path, _environment, _output_path,
+                                    {
+                                        'publishing': configuration.publishing.toDict(),
+                                        'site': configuration.site.toDict(),
+                                        'template': _template_configuration,
+                                    },
+                                    entry_digest=entry_digest, force=force, explain=explain)
+
+    return _dependencies
 
 
 def _build_context(context=None, **kwargs):
@@ -101,7 +496,7 @@ def _build_context(context=None, **kwargs):
     recursive_update(context, kwargs)
 
     # Insert all of the site details into the context as well
-    site_configuration = get_configuration().site.toDict()
+    site_configuration = get_configuration().site
     recursive_update(context.setdefault('site', {}), site_configuration)
 
     # Insert all of the template variables into the context as well
@@ -125,6 +520,52 @@ def _find_template(*args):
     return template_definition
 
 
+def has_template(*args):
+    """Determine if the template configuration contains the template definition, without logging an error."""
+    template_definition = _template_configuration.get('templates', {})
+    for template_path in args:
+        if not isinstance(template_definition, dict) or template_path not in template_definition:
+            return False
+        template_definition = template_definition[template_path]
+
+    return True
+
+
+def get_output_file(*args, context=None, **kwargs):
+    """
+    Provide the output file that the template definition is published to, without publishing it.
+    :param args: the arguments that will be used to find the template in the template configuration
+    :param context:
+    :param kwargs:
+    :return: path of the output file relative to the output directory.
+    """
+    context = _build_context(context=context, **kwargs)
+    template_definition = _find_template(*args)
+
+    return pathlib.Path(template_definition['destination'].format(**context))
+
+
+def write_content(content, *args, context=None, **kwargs):
+    """
+    Write content that is not rendered from a template to the destination of the template definition.
+    :param content: string or bytes that will be written.
+    :param args: the arguments that will be used to find the template in the template configuration
+    :param context:
+    :param kwargs:
+    :return: path of the output file relative to the output directory.
+    """
+    context = _build_context(context=context, **kwargs)
+    template_definition = _find_template(*args)
+
+    output_file = template_definition['destination'].format(**context)
+
+    if isinstance(content, str):
+        content = content.encode()
+    _write_output(output_file, content)
+
+    return pathlib.Path(output_file)
+
+
 def copy_file(file, *args, context=None, **kwargs):
     """
     Copy a file in place based on the arguments provided and the kwargs that are used to generate the path.
@@ -138,43 +579,57 @@ def copy_file(file, *args, context=None, **kwargs):
     template_definition = _find_template(*args)
 
     output_file = template_definition['destination'].format(**context)
-    output_file = _output_path / output_file
 
-    output_file.parent.mkdir(exist_ok=True, parents=True)
-    shutil.copy(str(file), str(output_file))
+    _copy_output(output_file, file)
 
-    return output_file.relative_to(_output_path)
+    return pathlib.Path(output_file)
 
 
 def url_filter(url):
     """Filter that will prepend the URL root for links in order to put the log in a directory on a web server."""
-    config = get_configuration()
-    if config.publishing.url_root:
-        return "{}{}".format(get_configuration().publishing.url_root, url)
+    url_root = get_configuration().publishing.url_root
+    if url_root:
+        return "{}{}".format(url_root, url)
     return url
 
 
 def markdown_filter(content):
     """Filter that will translate markdown content into HTML for display."""
-    return _markdown_conversion.reset().convert(content)
+    if _markdown_cache is not None:
+        key = content_key(_markdown_settings, content)
+        html = _markdown_cache.get(key)
+        if html is None:
+            html = _convert_markdown(content)
+            _markdown_cache.set(key, html)
+        return html
+
+    return _convert_markdown(content)
+
+
+def _convert_markdown(content):
+    """Convert the markdown content with the conversion object that belongs to the current thread."""
+    conversion = getattr(_markdown_conversion, 'instance', None)
+    if conversion is None:
+        markdown_configuration = get_configuration().publishing.markdown
+        conversion = _markdown_conversion.instance = markdown.Markdown(
+            extensions=list(markdown_configuration.extensions),
+            extension_configs=markdown_configuration.extension_configs.toDict())
+
+    return conversion.reset().convert(content)
 
 
 def _copy_static_files():
     """Responsible for copying over the static files after all of the contents have been generated."""
     configuration = get_configuration()
     template_path = pathlib.Path(configuration.publishing.templates)
-    output_path = pathlib.Path(configuration.publishing.output)
 
     static_files_list = _template_configuration.get('static_files', [])
 
     if static_files_list:
         for glob_definition in static_files_list:
             for file in template_path.glob(glob_definition):
-                logger.debug('Copying static file: {}'.format(file))
+                if file.is_dir():
+                    continue
 
-                # Make sure that the destination directory exists before copying the file into place
-                destination_parent = file.parent.relative_to(template_path)
-                destination = output_path / destination_parent
-                destination.mkdir(parents=True, exist_ok=True)
-
-                shutil.copy(str(file), str(destination))
+                logger.debug('Copying static file: {}'.format(file))
+                _copy_output(file.relative_to(template_path), file)
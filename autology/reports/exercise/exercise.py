@@ -3,7 +3,9 @@ Process all of the content for the exercise details, and calculate the number of
 the gpx files that have been stored.
 """
 from autology import topics, publishing
+from autology.configuration import add_default_configuration, get_configuration, get_cache_directory
 from autology.utilities import log_file
+from autology.utilities.cache import ContentCache, content_key
 import gpxpy
 import gpxpy.gpx
 import pytz
@@ -15,21 +17,93 @@ EXERCISE_ACTIVITY = 'exercise'
 GPX_FILE = 'gpx_file'
 GPX_DATA = 'gpx_data'
 
+# Version of the values stored in the GPX summary cache, changing this will cause the summaries to be calculated again.
+GPX_SUMMARY_VERSION = '1'
+
 # Pointer to the report plugin provided by simple report plugin functionality.
 _report_plugin = None
 
+# Summaries of the GPX files that have been parsed, keyed by the content of the file.
+_gpx_cache = None
+
 
 def register_plugin():
     """ Subscribe to the initialize method and add default configuration values to the settings object. """
     topics.Application.INITIALIZE.subscribe(_initialize)
+    topics.Application.FINALIZE.subscribe(_finalize)
+
+    add_default_configuration('exercise', {
+        # File name of the GPX summary cache, relative to the processing cache directory
+        'gpx_cache_file': 'gpx.sqlite',
+
+        # Maximum bytes of GPX summaries stored in the cache directory, 0 disables the cache
+        'gpx_cache_size': 16 * 1024 * 1024,
+    })
 
 
 def _initialize():
     """ Register for all of the required events that will be fired off by the main loop """
-    global _report_plugin
+    global _report_plugin, _gpx_cache
     _report_plugin = TimelineReport()
     _report_plugin.initialize()
 
+    exercise_configuration = get_configuration().exercise
+    if exercise_configuration.gpx_cache_size > 0:
+        _gpx_cache = ContentCache(get_cache_directory() / exercise_configuration.gpx_cache_file,
+                                  exercise_configuration.gpx_cache_size)
+
+
+def _finalize():
+    """Save the GPX summaries that were calculated by this execution."""
+    global _gpx_cache
+
+    if _gpx_cache is not None:
+        _gpx_cache.close()
+        _gpx_cache = None
+
+
+def gpx_summary(gpx_file):
+    """
+    Provide the summary of a GPX track, only parsing the file when its content has not been summarized before.
+    :param gpx_file: path to the GPX file.
+    :return: dictionary containing the start_time and end_time of the track, the moving_time, stopped_time,
+    moving_distance, stopped_distance and max_speed of the moving data, and the distance (3D length) of the track.
+    """
+    with open(str(gpx_file), 'rb') as gpx_file_content:
+        content = gpx_file_content.read()
+
+    key = None
+    if _gpx_cache is not None:
+        key = content_key(GPX_SUMMARY_VERSION, gpxpy.__version__, content)
+        summary = _gpx_cache.get(key)
+        if summary is not None:
+            return summary
+
+    gpx_data = gpxpy.parse(content.decode('utf-8'))
+
+    # Check to see if the gpx library can find a date, and use that value, otherwise must use the date value
+    # provided by the arguments.
+    # Arguments probably should always trump the file content.  In addition need to provide an end date time
+    # as well.
+    start_time, end_time = gpx_data.get_time_bounds()
+
+    # Newer versions of gpxpy provide timezone aware values when the times are marked as UTC.
+    if start_time.tzinfo is None:
+        start_time = pytz.utc.localize(start_time)
+    if end_time.tzinfo is None:
+        end_time = pytz.utc.localize(end_time)
+
+    moving_time, stopped_time, moving_distance, stopped_distance, max_speed = gpx_data.get_moving_data()
+
+    summary = dict(start_time=start_time, end_time=end_time, moving_time=moving_time, stopped_time=stopped_time,
+                   moving_distance=moving_distance, stopped_distance=stopped_distance, max_speed=max_speed,
+                   distance=gpx_data.length_3d())
+
+    if key is not None:
+        _gpx_cache.set(key, summary)
+
+    return summary
+
 
 class TimelineReport(SimpleReportPlugin):
 
@@ -39,6 +113,10 @@ class TimelineReport(SimpleReportPlugin):
         self.day_template_path = ['exercise', 'day']
         self.index_template_path = ['exercise', 'index']
 
+    def routed_activities(self):
+        """Overridden to be provided the exercise log files."""
+        return [EXERCISE_ACTIVITY]
+
     def test_activities(self, activities_list):
         """Overridden to process all of the log files that are passed in."""
         return EXERCISE_ACTIVITY in activities_list
@@ -53,23 +131,12 @@ class TimelineReport(SimpleReportPlugin):
                 # This should check to see if the gpx file is valid or not, and if it's valid, then the gpx file should
                 # be copied into place and a new markdown file should be created as well based on the start time of the
                 # content.
-                with open(gpx_file) as gpx_file_content:
-                    gpx_data = gpxpy.parse(gpx_file_content)
-
-                # Check to see if the gpx library can find a date, and use that value, otherwise must use the date value
-                # provided by the arguments.
-                # Arguments probably should always trump the file content.  In addition need to provide an end date time
-                # as well.
-                start_time, end_time = gpx_data.get_time_bounds()
-
-                start_time = pytz.utc.localize(start_time)
-                end_time = pytz.utc.localize(end_time)
-
-                moving_time, stopped_time, moving_distance, stopped_distance, max_speed = gpx_data.get_moving_data()
+                summary = gpx_summary(gpx_file)
+                start_time = summary['start_time']
 
-                entry.metadata[GPX_DATA] = dict(speed=dict(max=max_speed, min=0, average=0),
-                                                distance=gpx_data.length_3d(),
-                                                time=end_time - start_time)
+                entry.metadata[GPX_DATA] = dict(speed=dict(max=summary['max_speed'], min=0, average=0),
+                                                distance=summary['distance'],
+                                                time=summary['end_time'] - start_time)
 
                 # Copy the gpx file so that it can be referenced by the entry metadata
                 output_url = publishing.copy_file(gpx_file, 'exercise', 'data_file', date=start_time, id=self.id,
@@ -3,11 +3,11 @@ import pathlib
 
 import gpxpy
 import pytz
-import tzlocal
 import logging
 
 from autology.reports.models import Template
 from autology.utilities import log_file
+from autology.utilities.datetimes import local_timezone
 from autology.reports.timeline.template import template_start as timeline_start, template_end as timeline_end, \
     timeline_base
 
@@ -72,10 +72,10 @@ def _process_gpx_file(file=None):
         start_time, end_time = _gpx_data.get_time_bounds()
 
         if start_time:
-            start_time = pytz.utc.localize(start_time).astimezone(tzlocal.get_localzone())
+            start_time = pytz.utc.localize(start_time).astimezone(local_timezone())
 
         if end_time:
-            end_time = pytz.utc.localize(end_time).astimezone(tzlocal.get_localzone())
+            end_time = pytz.utc.localize(end_time).astimezone(local_timezone())
 
         return dict(start_time=start_time, end_time=end_time, gpx_file=str(gpx_file))
     except gpxpy.gpx.GPXXMLSyntaxException:
@@ -3,6 +3,7 @@ import datetime
 
 from autology import topics
 from autology.publishing import publish
+from autology.utilities import metrics
 
 # Collection of all of the reports that have been filed by other plugins
 _reports = []
@@ -27,8 +28,7 @@ def _initialize():
     # Topics used for stat generation
     topics.Processing.BEGIN.subscribe(_record_start_time)
     topics.Processing.END.subscribe(_record_end_time)
-    topics.Processing.PROCESS_FILE.subscribe(_count_processed_files)
-    topics.Processing.DAY_START.subscribe(_count_days)
+    topics.Processing.PROCESS_DAY.subscribe(_count_day)
 
 
 def _new_report_handler(report=None):
@@ -40,12 +40,20 @@ def _finish_processing():
     """Publish the index after all of the reports have been registered by the plugins."""
     _index_stats['generated_date'] = datetime.datetime.now()
     _index_stats['execution_time'] = (_index_stats['end_time'] - _index_stats['start_time']).total_seconds()
-    publish('index', 'index', reports=_reports, stats=_index_stats)
+    publish('index', 'index', reports=_reports, stats=_index_stats, history=metrics.get_history())
 
 
 def _record_start_time():
-    """Record the start time of processing."""
-    _index_stats['start_time'] = datetime.datetime.now()
+    """Record the start time of processing, replacing the results of any previous processing."""
+    global _reports, _index_stats
+
+    # New objects are created so that contexts which were already published are not modified.
+    _reports = []
+    _index_stats = {
+        'processed_files': 0,
+        'num_days': 0,
+        'start_time': datetime.datetime.now(),
+    }
 
 
 def _record_end_time():
@@ -53,13 +61,7 @@ def _record_end_time():
     _index_stats['end_time'] = datetime.datetime.now()
 
 
-def _count_processed_files(entry):
-    """Count the number of files that have been processed."""
-    count = _index_stats.setdefault('processed_files', 0)
-    _index_stats['processed_files'] = count + 1
-
-
-def _count_days(date):
-    """Count the number of days that have been processed."""
-    count = _index_stats.setdefault('num_days', 0)
-    _index_stats['num_days'] = count + 1
+def _count_day(date, entries):
+    """Count the number of days and files that have been processed."""
+    _index_stats['processed_files'] = _index_stats.setdefault('processed_files', 0) + len(entries)
+    _index_stats['num_days'] = _index_stats.setdefault('num_days', 0) + 1
@@ -1,10 +1,23 @@
 """Processes the front data in the markdown files to process project stat recordings."""
+import collections.abc
 import datetime
+import heapq
+import itertools
+import json
 import logging
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import namedtuple
 
 from autology import topics
-from autology.publishing import publish
+from autology.configuration import add_default_configuration, get_configuration, get_cache_directory
+from autology.publishing import get_output_file, has_template, publish, write_content
 from autology.reports.models import Report
+from autology.reports.project.rollups import TimeRollups, load_rollups, save_rollups
 from autology.utilities.log_file import MetaKeys
 
 try:
@@ -12,13 +25,23 @@ try:
 except ImportError:
     from yaml import Loader
 from dict_recursive_update import recursive_update as _r_update
-from autology.utilities import log_file
+from autology.utilities import entry_index, log_file
 
 # Constants:
 PROJECT_KEY = 'mkl-project'
 ORGANIZATION_KEY = 'mkl-organization'
 CUSTOMER_KEY = 'mkl-customer'
 
+# Directory in the cache directory that the project logs are written to when they are too large to keep in memory.
+SPILL_DIRECTORY = 'project_logs'
+
+# Number of references that are stored in each pickle of a spilled log file
+_SPILL_CHUNK_SIZE = 256
+
+# Reference to an entry in a project log.  The sequence is the order that the entries were added, so that entries with
+# the same time are provided in the order they were processed.
+LogReference = namedtuple('LogReference', 'timestamp sequence file mime_type duration')
+
 # This is a dictionary containing all of the defined projects, they key is a project identifier that is defined when
 # defining the project. Inside should be a dictionary containing a key of datetime object for an entry, and then the
 # entry that is associated with that project.
@@ -26,24 +49,132 @@ _defined_projects = {}
 _defined_organizations = {}
 _defined_customers = {}
 
+# Directory that the project logs of this process are written to, created when the first log is written.
+_spill_directory = None
+
+# Time spent on each of the projects in each period, and the tables that were built from it by the last processing.
+_rollups = TimeRollups()
+_rollup_tables = None
+
 logger = logging.getLogger(__name__)
 
 
 def register_plugin():
     """ Subscribe to the initialize method and add default configuration values to the settings object. """
     topics.Application.INITIALIZE.subscribe(_initialize)
+    topics.Application.FINALIZE.subscribe(_finalize)
+
+    add_default_configuration('project', {
+        # Number of log entries of a project that are kept in memory before they are written to the cache directory
+        'log_buffer_size': 4096,
+
+        # File name that the time rollups are stored in, relative to the processing cache directory
+        'rollups_file': 'project_rollups.json',
+    })
 
 
 def _initialize():
     """ Register for all of the required events that will be fired off by the main loop """
-    topics.Processing.PROCESS_FILE.subscribe(process_file)
+    global _rollup_tables
+
+    # Remove the logs that were left behind by executions that did not finish
+    _remove_abandoned_logs(get_cache_directory() / SPILL_DIRECTORY)
+
+    # Provide the rollups of the previous execution until the log has been processed again
+    _rollup_tables = load_rollups(get_cache_directory() / get_configuration().project.rollups_file)
+
+    topics.Processing.BEGIN.subscribe(_start_processing)
+    topics.Processing.PROCESS_DAY.subscribe(process_day)
     topics.Processing.END.subscribe(_build_report)
 
 
+def _finalize():
+    """Remove the directory that the project logs of this process were written to."""
+    global _spill_directory
+
+    if _spill_directory is not None:
+        shutil.rmtree(str(_spill_directory), ignore_errors=True)
+        _spill_directory = None
+
+
+def _remove_abandoned_logs(directory):
+    """
+    Remove the directories of the project logs that were written by processes that are no longer executing.  Each
+    process writes to its own directory, which is named starting with the process identifier.
+    """
+    if not directory.is_dir():
+        return
+
+    for process_directory in directory.iterdir():
+        try:
+            process_id = int(process_directory.name.split('-', 1)[0])
+        except ValueError:
+            continue
+
+        if not _process_exists(process_id):
+            shutil.rmtree(str(process_directory), ignore_errors=True)
+
+
+def _process_exists(process_id):
+    """Determine if the process is executing, assuming that it is when that cannot be determined."""
+    # Signal 0 would terminate the process on Windows instead of checking for it.
+    if os.name == 'nt':
+        return True
+
+    try:
+        os.kill(process_id, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+    return True
+
+
+def _get_spill_directory():
+    """Provide the directory that the project logs of this process are written to."""
+    global _spill_directory
+
+    if _spill_directory is None:
+        directory = get_cache_directory() / SPILL_DIRECTORY
+        directory.mkdir(parents=True, exist_ok=True)
+        _spill_directory = pathlib.Path(tempfile.mkdtemp(prefix='{}-'.format(os.getpid()), dir=str(directory)))
+
+    return _spill_directory
+
+
+def _start_processing():
+    """Replace the definitions that were collected by any previous processing."""
+    global _defined_projects, _defined_organizations, _defined_customers, _rollups
+
+    # New objects are created so that contexts which were already published are not modified.
+    _defined_projects = {}
+    _defined_organizations = {}
+    _defined_customers = {}
+    _rollups = TimeRollups()
+
+
 def _build_report():
     """Convert all the collated data into renderable templates."""
+    global _rollup_tables
+
     orphaned_projects = []
 
+    for project in _defined_projects.values():
+        project.setdefault('customers', [])
+
+    # Provide each of the definitions with the time spent on it in each period
+    _rollup_tables = _rollups.build(_defined_projects)
+    for scope, definitions in (('project', _defined_projects), ('organization', _defined_organizations),
+                               ('customer', _defined_customers)):
+        for definition_id, definition in definitions.items():
+            definition['rollups'] = {period: tables.get(definition_id, {})
+                                     for period, tables in _rollup_tables[scope].items()}
+
+    save_rollups(get_cache_directory() / get_configuration().project.rollups_file, _rollup_tables)
+    if has_template('project', 'rollups'):
+        write_content(json.dumps(_rollup_tables, default=str), 'project', 'rollups')
+
     for project in _defined_projects.values():
         organization = _defined_organizations.get(project.get('organization'))
         if organization:
@@ -51,17 +182,18 @@ def _build_report():
         else:
             orphaned_projects.append(project)
 
-        # Sort the logs that are stored on the project
-        project['log'] = sorted(project.get('log', []), key=lambda x: x.metadata['time'])
+        # Projects without any log entries are provided an empty log
+        project.setdefault('log', [])
 
-        # Now generate a report for each of the projects.
-        url = publish('project', 'project', project=project)
-        project['url'] = url
+        # Now generate a report for each of the projects, the url is set first so that it is provided to the template.
+        project['url'] = get_output_file('project', 'project', project=project)
+        publish('project', 'project', project=project)
 
     main_context = {
         'projects': _defined_projects.values(),
         'organizations': _defined_organizations.values(),
         'customers': _defined_customers.values(),
+        'rollups': _rollup_tables,
     }
 
     if orphaned_projects:
@@ -71,6 +203,12 @@ def _build_report():
     topics.Reporting.REGISTER_REPORT.publish(report=Report('Project', 'List of all project files', url))
 
 
+def process_day(date, entries):
+    """Process all of the files of a day."""
+    for entry in entries:
+        process_file(entry)
+
+
 def process_file(entry):
     """
     Process the file.
@@ -106,8 +244,9 @@ def _process_markdown(post):
         # Spec says that this can only be a string
         project_definition = _defined_projects.setdefault(post.metadata[PROJECT_KEY],
                                                           {'id': post.metadata[PROJECT_KEY]})
-        project_log = project_definition.setdefault('log', [])
-        project_log.append(post)
+        project_log = project_definition.get('log')
+        if not isinstance(project_log, ProjectLog):
+            project_log = project_definition['log'] = ProjectLog()
 
         # Calculate how long the event lasts
         log_date = post.metadata[log_file.MetaKeys.TIME]
@@ -115,9 +254,11 @@ def _process_markdown(post):
         duration = log_end_date - log_date
         time_on_project = project_definition.get('duration', datetime.timedelta())
         project_definition['duration'] = time_on_project + duration
+        _rollups.add(post.metadata[PROJECT_KEY], log_date, duration)
 
         # Set the date values in the post to be the python objects instead of just strings
         post.metadata['duration'] = duration
+        project_log.append(post, duration)
 
 
 def _process_yaml(documents):
@@ -181,13 +322,16 @@ def _handle_project_definition(definition):
     previous_definition = _defined_projects.setdefault(definition['id'], {})
     _r_update(previous_definition, definition)
 
-    # Store the defined customers
+    # Store the defined customers, and record their identifiers on the project
+    project_customers = previous_definition.setdefault('customers', [])
     for customer in defined_customers:
 
         if not isinstance(customer, dict):
             customer = {'id': customer}
 
         _handle_customer_definition(customer)
+        if customer['id'] not in project_customers:
+            project_customers.append(customer['id'])
 
 
 def _handle_customer_definition(definition):
@@ -197,6 +341,154 @@ def _handle_customer_definition(definition):
     _r_update(previous_definition, definition)
 
 
+class ProjectLog(collections.abc.Sequence):
+    """
+    Log entries of a project, which are provided in time order.  The entries are kept in memory until their number
+    reaches the project.log_buffer_size configuration value, then only a reference to each of them is sorted and written
+    to a file in the cache directory.  Reading the log merges the files with the entries that are still in memory, and
+    loads each of the written entries from the entry index or its log file as it is provided.
+    """
+
+    def __init__(self, buffer_size=None):
+        if buffer_size is None:
+            buffer_size = get_configuration().project.log_buffer_size
+
+        self._buffer_size = buffer_size
+        self._buffer = []
+        self._entries = {}
+        self._runs = []
+        self._length = 0
+
+        # The files are removed once the log is no longer referenced by the contexts that it was published in.
+        weakref.finalize(self, _remove_runs, self._runs)
+
+    def append(self, entry, duration):
+        """Add the entry to the log, the duration is added to the metadata of the entry when it is loaded again."""
+        reference = LogReference(entry.metadata[log_file.MetaKeys.TIME].timestamp(), self._length, str(entry.file),
+                                 entry.mime_type, duration)
+        self._buffer.append(reference)
+        self._entries[reference.sequence] = entry
+        self._length += 1
+
+        if self._buffer_size and len(self._buffer) >= self._buffer_size:
+            self._spill()
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            positions = range(self._length)[index]
+            if positions.step > 0:
+                references = itertools.islice(self._references(), positions.start, positions.stop, positions.step)
+            else:
+                references = itertools.islice(self._references(reverse=True), self._length - 1 - positions.start,
+                                              self._length - 1 - positions.stop, -positions.step)
+            return [entry for entry in map(self._load, references) if entry is not None]
+
+        position = range(self._length)[index]
+
+        # Read from the end of the log that is closest to the entry
+        if position < self._length // 2:
+            reference = next(itertools.islice(self._references(), position, None))
+        else:
+            reference = next(itertools.islice(self._references(reverse=True), self._length - 1 - position, None))
+
+        return self._load(reference)
+
+    def __iter__(self):
+        for entry in map(self._load, self._references()):
+            if entry is not None:
+                yield entry
+
+    def __reversed__(self):
+        for entry in map(self._load, self._references(reverse=True)):
+            if entry is not None:
+                yield entry
+
+    def dependency_inputs(self):
+        """
+        Provide the log files and the values that the rendered log depends on, so that the dependency graph does not
+        need to load the entries in order to sign the log.
+        """
+        for reference in self._references():
+            yield reference.file, reference
+
+    def _references(self, reverse=False):
+        """Generator that yields the references in time order, or in reverse time order."""
+        # The buffer is copied, as the log can be read by more than one render at the same time.
+        return heapq.merge(*[_read_run(path, offsets, reverse) for path, offsets in self._runs],
+                           sorted(self._buffer, reverse=reverse), reverse=reverse)
+
+    def _load(self, reference):
+        """Provide the entry of the reference, None if it was written out and can no longer be loaded."""
+        entry = self._entries.get(reference.sequence)
+        return entry if entry is not None else _load_reference(reference)
+
+    def _spill(self):
+        """Write the sorted references in the buffer to a new file in the cache directory."""
+        references = sorted(self._buffer)
+        descriptor, path = tempfile.mkstemp(suffix='.pickle', dir=str(_get_spill_directory()))
+
+        # The offset of each chunk is stored so that the file can be read from its end.
+        offsets = []
+        with os.fdopen(descriptor, 'wb') as run_file:
+            for start in range(0, len(references), _SPILL_CHUNK_SIZE):
+                offsets.append(run_file.tell())
+                pickle.dump(references[start:start + _SPILL_CHUNK_SIZE], run_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._runs.append((path, offsets))
+        self._buffer = []
+        self._entries = {}
+
+
+def _read_run(path, offsets, reverse=False):
+    """Generator that yields the references that were written to the file by ProjectLog._spill."""
+    with open(path, 'rb') as run_file:
+        for offset in (reversed(offsets) if reverse else offsets):
+            run_file.seek(offset)
+            references = pickle.load(run_file)
+            yield from (reversed(references) if reverse else references)
+
+
+def _remove_runs(runs):
+    """Remove the files that the references of a project log were written to."""
+    for path, _ in runs:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _load_reference(reference):
+    """
+    Load the entry of the reference from the entry index or its log file, None if it can no longer be loaded.  The
+    entries are loaded again while the pages are rendered, so they are not counted in the statistics of the index.
+    """
+    file_processor = log_file.get_file_processor(mime_type=reference.mime_type)
+    index = entry_index.get_index()
+
+    try:
+        if index is not None:
+            entry = index.load(pathlib.Path(reference.file), file_processor, record=False)
+        else:
+            entry = file_processor.load(pathlib.Path(reference.file))
+    except (OSError, KeyError):
+        logger.exception('Cannot load project log entry: {}'.format(reference.file))
+        return None
+
+    entry.metadata['duration'] = reference.duration
+    return entry
+
+
 def get_defined_projects():
     """Return all of the projects that have been defined by the log entries."""
     return _defined_projects
+
+
+def get_rollups():
+    """
+    Return the time rollup tables that were built by the last processing of the log, or stored by the previous
+    execution if the log has not been processed yet.  None if they are not available.
+    """
+    return _rollup_tables
@@ -0,0 +1,106 @@
+"""
+Tables of the time that is spent on each of the projects in each day, ISO week and month.  The time of each log entry is
+added to the tables of its project as the entry is processed, and the tables of the organizations and customers are
+summed from the tables of their projects once all of the definitions are known, so the log does not need to be scanned
+to provide the time spent in a period.
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Periods that the time is rolled up into
+PERIODS = ('day', 'week', 'month')
+
+# Definitions that the time is rolled up for
+SCOPES = ('project', 'organization', 'customer')
+
+
+def period_keys(time):
+    """
+    Provide the key of each of the periods that the time is within.
+    :param time: datetime value in the site timezone.
+    :return: tuple of the day (2017-01-31), ISO week (2017-W05) and month (2017-01) keys.
+    """
+    iso_year, iso_week, _ = time.isocalendar()
+    return ('{:04d}-{:02d}-{:02d}'.format(time.year, time.month, time.day),
+            '{:04d}-W{:02d}'.format(iso_year, iso_week),
+            '{:04d}-{:02d}'.format(time.year, time.month))
+
+
+class TimeRollups:
+    """Time spent on each of the projects, in seconds, by day, ISO week and month."""
+
+    def __init__(self):
+        self._projects = {period: {} for period in PERIODS}
+
+    def add(self, project_id, time, duration):
+        """
+        Add the duration of a log entry to the tables of the project.  The whole duration is added to the periods that
+        the entry starts in.
+        :param project_id: identifier of the project.
+        :param time: start time of the entry.
+        :param duration: timedelta of the entry.
+        """
+        seconds = duration.total_seconds()
+        for period, key in zip(PERIODS, period_keys(time)):
+            table = self._projects[period].setdefault(project_id, {})
+            table[key] = table.get(key, 0) + seconds
+
+    def build(self, projects):
+        """
+        Build the tables of the projects, organizations and customers.
+        :param projects: the project definitions, containing the organization and customers of each project.
+        :return: dictionary of each scope, containing a dictionary of each period, containing the tables of the time
+        spent on each of the definitions keyed by their identifier.  Each table is keyed by the period keys in order.
+        """
+        tables = {scope: {period: {} for period in PERIODS} for scope in SCOPES}
+
+        for period in PERIODS:
+            for project_id, table in self._projects[period].items():
+                project = projects.get(project_id, {})
+                owners = [('project', project_id)]
+                if project.get('organization') is not None:
+                    owners.append(('organization', project['organization']))
+                owners.extend(('customer', customer_id) for customer_id in project.get('customers', []))
+
+                for scope, owner_id in owners:
+                    owner_table = tables[scope][period].setdefault(owner_id, {})
+                    for key, seconds in table.items():
+                        owner_table[key] = owner_table.get(key, 0) + seconds
+
+            # The tables are ordered so that they can be iterated by the templates and written out consistently
+            for scope in SCOPES:
+                tables[scope][period] = {owner_id: dict(sorted(table.items()))
+                                         for owner_id, table in sorted(tables[scope][period].items(), key=_owner_key)}
+
+        return tables
+
+
+def _owner_key(item):
+    """Sort key of the identifiers, which are not guaranteed to be of the same type."""
+    return str(item[0])
+
+
+def save_rollups(path, tables):
+    """Store the tables in a JSON file, only writing the file when its content has changed."""
+    content = json.dumps(tables, default=str)
+    try:
+        if path.read_text() == content:
+            return
+    except FileNotFoundError:
+        pass
+
+    path.write_text(content)
+
+
+def load_rollups(path):
+    """Load the tables that were stored by the last execution of the project report, None if they are not available."""
+    try:
+        with path.open() as rollup_file:
+            return json.load(rollup_file)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        logger.warning('Cannot read project rollups: {}'.format(path))
+        return None
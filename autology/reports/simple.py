@@ -5,6 +5,7 @@ plugin.
 from datetime import datetime, time
 
 from collections import namedtuple
+from collections.abc import Hashable
 
 from autology import topics
 from autology.configuration import add_default_configuration, get_configuration
@@ -17,6 +18,11 @@ DayReport = namedtuple('DayReport', 'date url num_entries')
 
 _defined_plugins = []
 
+# Plugins that are provided each entry, indexed by the activities that they report on.  Plugins that report on all of
+# the entries are stored separately.
+_routes = {}
+_all_activity_plugins = []
+
 
 def register_plugin():
     """
@@ -28,7 +34,13 @@ def register_plugin():
     # TODO: Update to be a bit more configurable, change activities to definitions, then allow for activities to be
     # defined as part of the definition.
     add_default_configuration('simple', {
-        'activities': []
+        'activities': [],
+
+        # Create a report for each activity that is found in the log entries, but is not defined in activities
+        'auto_discover': False,
+
+        # Activities that will never have a report created by auto discovery, project has its own report
+        'exclude': ['project'],
     })
 
 
@@ -43,6 +55,58 @@ def _initialize():
         _defined_plugins.append(plugin)
 
 
+def _register_route(plugin):
+    """Provide the plugin with all of the entries that contain the activities it reports on."""
+    if not _routes and not _all_activity_plugins:
+        topics.Processing.PROCESS_FILE.subscribe(_route_entry)
+
+    activities = plugin.routed_activities()
+    if activities is None:
+        _all_activity_plugins.append(plugin)
+    else:
+        for activity in activities:
+            _routes.setdefault(activity, []).append(plugin)
+
+
+def _route_entry(entry):
+    """Deliver the entry to the plugins that report on all entries, and the plugins of each of its activities."""
+    for plugin in _all_activity_plugins:
+        plugin._data_processor(entry)
+
+    activities = entry.metadata.get(MetaKeys.ACTIVITIES, None) or []
+    if isinstance(activities, str):
+        activities = [activities]
+
+    delivered = set()
+    for activity in activities:
+        # Activities that are not hashable (mappings, lists) cannot be routed or discovered.
+        if not isinstance(activity, Hashable):
+            continue
+
+        plugins = _routes.get(activity)
+        if plugins is None:
+            plugins = _discover(activity)
+
+        for plugin in plugins:
+            if id(plugin) not in delivered:
+                delivered.add(id(plugin))
+                plugin._data_processor(entry)
+
+
+def _discover(activity):
+    """Create a report for an activity that does not have one, when auto discovery is enabled."""
+    configuration = get_configuration().simple
+    if not configuration.auto_discover or activity in configuration.exclude or not isinstance(activity, str):
+        return []
+
+    plugin = SimpleReportPlugin(activity, activity.replace('_', ' ').title(),
+                                'Entries with the activity: {}'.format(activity))
+    plugin.initialize()
+    _defined_plugins.append(plugin)
+
+    return _routes[activity]
+
+
 class SimpleReportPlugin:
 
     day_template_path = ['simple', 'day']
@@ -63,10 +127,16 @@ class SimpleReportPlugin:
         Register for all of the required events that will be fired off by the main loop
         :return:
         """
+        topics.Processing.BEGIN.subscribe(self._start_processing)
         topics.Processing.DAY_START.subscribe(self._start_day_processing)
-        topics.Processing.PROCESS_FILE.subscribe(self._data_processor)
         topics.Processing.DAY_END.subscribe(self._end_day_processing)
         topics.Processing.END.subscribe(self._end_processing)
+        _register_route(self)
+
+    def _start_processing(self):
+        """Event handler that will be notified before the files are processed, clears out any previous results."""
+        self._day_content = []
+        self._dates = []
 
     def _start_day_processing(self, date):
         """
@@ -76,6 +146,10 @@ class SimpleReportPlugin:
         """
         self._day_content = []
 
+    def routed_activities(self):
+        """Activities of the entries that are provided to this plugin, None to be provided all of the entries."""
+        return [self.id]
+
     def test_activities(self, activities_list):
         return self.id in activities_list
 
@@ -85,7 +159,7 @@ class SimpleReportPlugin:
         :param entry:
         :return:
         """
-        if entry.mime_type is not md_loader.MIME_TYPE:
+        if entry.mime_type != md_loader.MIME_TYPE:
             return
 
         activities_list = entry.metadata.get(MetaKeys.ACTIVITIES, [])
@@ -1,9 +1,9 @@
 """Simple template definition for a log file that contains start time, end time, location, and empty content."""
 from datetime import datetime
-import tzlocal
 
 import frontmatter
 
+from autology.utilities.datetimes import local_timezone
 from autology.utilities.log_file import MetaKeys, Entry
 from autology.utilities.processors import markdown
 from autology.reports.models import Template
@@ -25,13 +25,13 @@ def template_start(start_time=None, end_time=None, location='home', activities=N
     """
 
     if start_time is None:
-        start_time = tzlocal.get_localzone().localize(datetime.now())
+        start_time = local_timezone().localize(datetime.now())
     else:
         if type(start_time) is not datetime:
-            start_time = tzlocal.get_localzone().localize(datetime.strptime(start_time, DATE_FORMAT))
+            start_time = local_timezone().localize(datetime.strptime(start_time, DATE_FORMAT))
 
     if end_time is not None and type(end_time) is not datetime:
-        end_time = tzlocal.get_localzone().localize(datetime.strptime(end_time, DATE_FORMAT))
+        end_time = local_timezone().localize(datetime.strptime(end_time, DATE_FORMAT))
 
     if activities is None:
         activities = []
@@ -57,15 +57,15 @@ def template_end(post, **kwargs):
     :param post: the post file that will be modified.
     """
     if not post.metadata[MetaKeys.END_TIME]:
-        post.metadata[MetaKeys.END_TIME] = tzlocal.get_localzone().localize(datetime.now())
+        post.metadata[MetaKeys.END_TIME] = local_timezone().localize(datetime.now())
     else:
         # Need to set the timezone value for the post to be the current time zone.
-        post.metadata[MetaKeys.END_TIME] = post.metadata[MetaKeys.END_TIME].astimezone(tzlocal.get_localzone())
+        post.metadata[MetaKeys.END_TIME] = post.metadata[MetaKeys.END_TIME].astimezone(local_timezone())
 
     # Time value is currently stored in a different timezone, so make sure that it's set to the local timezone value
     # just as the end time is
     if MetaKeys.TIME in post.metadata:
-        post.metadata[MetaKeys.TIME] = post.metadata[MetaKeys.TIME].astimezone(tzlocal.get_localzone())
+        post.metadata[MetaKeys.TIME] = post.metadata[MetaKeys.TIME].astimezone(local_timezone())
 
     return post
 
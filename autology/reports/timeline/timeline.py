@@ -44,6 +44,10 @@ class TimelineReport(SimpleReportPlugin):
         self.day_template_path = ['timeline', 'day']
         self.index_template_path = ['timeline', 'index']
 
+    def routed_activities(self):
+        """Overridden to be provided all of the log files."""
+        return None
+
     def test_activities(self, activities_list):
         """Overridden to process all of the log files that are passed in."""
         return True
@@ -2,20 +2,40 @@
 Events that are used in the publish subscription values.
 """
 import enum
-from pubsub import pub
+
+# Listeners of each of the topics.  The enumeration members are used as the keys, so no topic names need to be built
+# when publishing.  The listeners are stored in tuples that are replaced when subscribing, so a listener can subscribe
+# or unsubscribe while a message is being delivered without changing the listeners that receive that message.
+_listeners = {}
 
 
 class PubSubEnumMixin:
     """Mixin that allows for the enumerations to publish and subscribe themselves."""
 
     def subscribe(self, listener):
-        return pub.subscribe(listener, self._build_topic_name())
+        """
+        Subscribe the listener to the topic, it will be called with the keyword arguments of each published message.
+        :return: tuple of the listener and True if it was subscribed, False if it was already subscribed.
+        """
+        listeners = _listeners.get(self, ())
+        if listener in listeners:
+            return listener, False
 
-    def publish(self, **kwargs):
-        pub.sendMessage(self._build_topic_name(), **kwargs)
+        _listeners[self] = listeners + (listener,)
+        return listener, True
+
+    def unsubscribe(self, listener):
+        """Remove the listener from the topic."""
+        _listeners[self] = tuple(subscribed for subscribed in _listeners.get(self, ()) if subscribed != listener)
 
-    def _build_topic_name(self):
-        return "{}.{}".format(self.__class__.__name__.lower(), self.value)
+    def has_listeners(self):
+        """Determine if there are any listeners subscribed to the topic."""
+        return bool(_listeners.get(self))
+
+    def publish(self, **kwargs):
+        """Deliver the message to all of the listeners in the order that they subscribed."""
+        for listener in _listeners.get(self, ()):
+            listener(**kwargs)
 
 
 @enum.unique
@@ -29,6 +49,12 @@ class Processing(PubSubEnumMixin, enum.Enum):
     PROCESS_FILE -
       parameters:
         entry: autology.reports.models.Entry tuple
+    PROCESS_DAY -
+      Event that is fired off before DAY_END with all of the entries of the day, only published when there are
+      listeners.  Reports that handle all of the entries together should subscribe to this instead of PROCESS_FILE.
+      parameters:
+        date - datetime.date object for the day that was processed.
+        entries - list of the autology.reports.models.Entry tuples of the day, in the order they were processed.
     BEGIN -
       Event that is fired off before processing files.
       parameters: none
@@ -39,6 +65,7 @@ class Processing(PubSubEnumMixin, enum.Enum):
     DAY_START = 'day_start'
     DAY_END = 'day_end'
     PROCESS_FILE = 'process_file'
+    PROCESS_DAY = 'process_day'
     BEGIN = 'begin'
     END = 'end'
 
@@ -0,0 +1,150 @@
+"""
+Content addressed cache of values that are expensive to calculate.  The most recently used values are held in memory,
+and the values are stored in a SQLite file between executions.  Values that are added are written to the file in
+batches, so they are not held in memory until the cache is closed.  The file is limited in size, removing the least
+recently used values when it grows too large.
+"""
+import collections
+import hashlib
+import logging
+import pathlib
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Number of values that are held in memory by default
+DEFAULT_MEMORY_ENTRIES = 4096
+
+# Number of added values, and the bytes of the pickled values, that are held before they are written to the file
+PENDING_ENTRIES = 256
+PENDING_SIZE = 4 * 1024 * 1024
+
+
+def content_key(*parts):
+    """Build a cache key out of the parts provided, strings are encoded before being hashed."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """Two tier (memory and SQLite) least recently used cache, safe to use from multiple threads."""
+
+    def __init__(self, path, max_size, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        """
+        :param path: file that the values are stored in between executions.
+        :param max_size: maximum number of bytes of stored values that are kept in the file.
+        :param memory_entries: maximum number of values that are held in memory.
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._max_size = max_size
+        self._memory_entries = memory_entries
+        self._memory = collections.OrderedDict()
+
+        # Values that have been added in this execution and not yet written to the file, and the stored values that have
+        # been used.
+        self._pending = {}
+        self._pending_size = 0
+        self._accessed = set()
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS cache ('
+                                 'key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)')
+
+    def get(self, key, default=None):
+        """Provide the value stored for the key, or default if it is not in the cache."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+            if key in self._pending:
+                value = pickle.loads(self._pending[key])
+                self._remember(key, value)
+                self.hits += 1
+                return value
+
+            row = self._connection.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            value = pickle.loads(row[0])
+            self._accessed.add(key)
+            self._remember(key, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store the value for the key, it is written to the file with the next batch of added values."""
+        with self._lock:
+            stored = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            self._pending_size += len(stored) - len(self._pending.get(key, b''))
+            self._pending[key] = stored
+            self._remember(key, value)
+
+            if len(self._pending) >= PENDING_ENTRIES or self._pending_size >= PENDING_SIZE:
+                self._write_pending()
+
+    def close(self):
+        """Write out all of the values added in this execution, remove the least recently used values and close."""
+        with self._lock:
+            logger.debug('Cache {} hits: {} misses: {}'.format(self.path.name, self.hits, self.misses))
+            self._write_pending()
+            self._connection.executemany('UPDATE cache SET accessed = ? WHERE key = ?',
+                                         [(time.time(), key) for key in self._accessed])
+            self._evict()
+
+            self._connection.commit()
+            self._connection.close()
+
+            self._accessed = set()
+            self._memory.clear()
+
+    def _write_pending(self):
+        """
+        Write the values that have been added to the file.  Each batch is committed so that the file is not locked
+        for the rest of the execution, the values are addressed by their content so a partial execution stores valid
+        values.
+        """
+        now = time.time()
+        self._connection.executemany('INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                                     [(key, value, len(value), now) for key, value in self._pending.items()])
+        self._connection.commit()
+        self._pending = {}
+        self._pending_size = 0
+
+    def _remember(self, key, value):
+        """Add the value to the in memory values, removing the least recently used value when there are too many."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Remove the least recently used values from the file until it is within the size limit."""
+        total_size, = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()
+        if total_size <= self._max_size:
+            return
+
+        expired = []
+        for key, size in self._connection.execute('SELECT key, size FROM cache ORDER BY accessed'):
+            if total_size <= self._max_size:
+                break
+            expired.append((key,))
+            total_size -= size
+
+        self._connection.executemany('DELETE FROM cache WHERE key = ?', expired)
@@ -0,0 +1,136 @@
+"""
+Normalization of the datetime values that are loaded from the log files.  Naive datetime values are stored in UTC by
+the YAML parser, and are translated into the site timezone.  The timezones and the UTC offsets are resolved once and
+cached, and the front matter loader translates the values while they are parsed so that the metadata does not need to
+be walked afterwards.
+"""
+import datetime
+import functools
+
+import pytz
+import tzlocal
+import yaml
+from frontmatter.default_handlers import YAMLHandler
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+from autology.configuration import get_configuration
+
+_ONE_HOUR = datetime.timedelta(hours=1)
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name):
+    """Provide the timezone object for the timezone name."""
+    return pytz.timezone(name)
+
+
+def site_timezone():
+    """Provide the timezone that the site is generated in."""
+    return get_timezone(get_configuration().site.timezone)
+
+
+@functools.lru_cache(maxsize=None)
+def local_timezone():
+    """Provide the timezone of the machine the application is executing on."""
+    return tzlocal.get_localzone()
+
+
+@functools.lru_cache(maxsize=8192)
+def _hour_offset(timezone, utc_hour):
+    """
+    Find the timezone information for the hour starting at utc_hour.
+    :return: tuple of the UTC offset and timezone information if they are valid for the whole hour, otherwise None.
+    """
+    start = pytz.utc.localize(utc_hour).astimezone(timezone)
+    end = pytz.utc.localize(utc_hour + _ONE_HOUR - datetime.timedelta(microseconds=1)).astimezone(timezone)
+
+    if start.utcoffset() != end.utcoffset():
+        return None
+
+    return start.utcoffset(), start.tzinfo
+
+
+def from_utc(value, timezone=None):
+    """
+    Translate a naive datetime value that is stored in UTC into the timezone provided.
+    :param value: naive datetime value in UTC.
+    :param timezone: the timezone to translate into, defaults to the site timezone.
+    """
+    if timezone is None:
+        timezone = site_timezone()
+
+    offset = _hour_offset(timezone, value.replace(minute=0, second=0, microsecond=0))
+    if offset is None:
+        # The offset changes during this hour, so it cannot be shared with the other values in the hour.
+        return pytz.utc.localize(value).astimezone(timezone)
+
+    utc_offset, tzinfo = offset
+    return (value + utc_offset).replace(tzinfo=tzinfo)
+
+
+def normalize_datetimes(dictionary, timezone=None):
+    """
+    Translate all of the naive datetime values in the dictionary (and the dictionaries contained within it) into the
+    timezone.
+    :param dictionary: the dictionary containing the values to process.
+    :param timezone: the timezone to translate into, defaults to the site timezone.
+    :return: the dictionary
+    """
+    if timezone is None:
+        timezone = site_timezone()
+
+    for key, value in dictionary.items():
+        if type(value) is datetime.datetime:
+            if value.tzinfo is None:
+                dictionary[key] = from_utc(value, timezone)
+        elif isinstance(value, dict):
+            normalize_datetimes(value, timezone)
+
+    return dictionary
+
+
+class NormalizingLoader(_SafeLoader):
+    """
+    YAML loader that translates the naive timestamps into the site timezone as they are constructed.  In the same way
+    as normalize_datetimes, only the values of the document mapping and the mappings contained within it are
+    translated, the timestamps that are contained in sequences are provided as they are loaded.
+    """
+
+    def construct_document(self, node):
+        self._normalized_nodes = set()
+        self._find_normalized_nodes(node, set())
+        return super().construct_document(node)
+
+    def _find_normalized_nodes(self, node, visited):
+        """Collect the nodes that are the values of the mappings that are reached through mappings."""
+        if not isinstance(node, yaml.MappingNode) or id(node) in visited:
+            return
+
+        visited.add(id(node))
+        for _, value_node in node.value:
+            self._normalized_nodes.add(id(value_node))
+            self._find_normalized_nodes(value_node, visited)
+
+    def construct_normalized_timestamp(self, node):
+        value = self.construct_yaml_timestamp(node)
+        if isinstance(value, datetime.datetime) and value.tzinfo is None and id(node) in self._normalized_nodes:
+            value = from_utc(value)
+        return value
+
+
+NormalizingLoader.add_constructor('tag:yaml.org,2002:timestamp', NormalizingLoader.construct_normalized_timestamp)
+
+
+class FrontMatterHandler(YAMLHandler):
+    """Front matter handler that loads the metadata with the normalizing loader."""
+
+    def load(self, fm, **kwargs):
+        return yaml.load(fm, Loader=NormalizingLoader)
+
+
+# Handler that can be provided to frontmatter.load
+FRONT_MATTER_HANDLER = FrontMatterHandler()
@@ -0,0 +1,208 @@
+"""
+Dependency graph that records the inputs that were used to render each of the output files.  The log entries, templates
+and configuration values that went into an output are stored between executions, so outputs whose inputs have not
+changed are not rendered again.
+"""
+import collections.abc
+import datetime
+import hashlib
+import json
+import logging
+import pathlib
+
+from jinja2 import meta
+
+from autology.utilities.log_file import Entry
+
+logger = logging.getLogger(__name__)
+
+# Version of the stored graph, changing this will cause all of the outputs to be rendered again.
+GRAPH_VERSION = 1
+
+
+def stat_digest(file_path):
+    """Digest used for entries that are not stored in the entry index, built from the file size and modification time."""
+    stat = pathlib.Path(file_path).stat()
+    return '{}:{}'.format(stat.st_size, stat.st_mtime_ns)
+
+
+class DependencyGraph:
+    """Records the inputs of each output file and determines which of the outputs need to be rendered again."""
+
+    def __init__(self, path, environment, output_path, configuration, entry_digest=None, force=False, explain=None):
+        """
+        :param path: file that the graph is stored in between executions.
+        :param environment: jinja environment used to find the templates that are referenced by a template.
+        :param output_path: directory that the output files are written to.
+        :param configuration: dictionary of the configuration values that are used by all of the outputs.
+        :param entry_digest: callable that provides the content hash of a log file, defaults to the file stat values.
+        :param force: ignore the stored graph so that all of the outputs are rendered.
+        :param explain: callable that is provided the output file and the reasons each time an output is rendered.
+        """
+        self.path = pathlib.Path(path)
+        self.rendered = 0
+        self.skipped = 0
+
+        self._environment = environment
+        self._output_path = pathlib.Path(output_path)
+        self._entry_digest = entry_digest or stat_digest
+        self._explain = explain
+        self._configuration = hashlib.sha256(json.dumps(configuration, sort_keys=True,
+                                                        default=str).encode()).hexdigest()
+        self._template_digests = {}
+        self._current = {}
+        self._previous = {}
+
+        if not force and self.path.exists():
+            try:
+                with self.path.open() as graph_file:
+                    stored_graph = json.load(graph_file)
+                if stored_graph.get('version') == GRAPH_VERSION:
+                    self._previous = stored_graph.get('outputs', {})
+            except ValueError:
+                logger.warning('Cannot read dependency graph: {}'.format(self.path))
+
+    def check(self, output_file, template, context):
+        """
+        Determine if the output file needs to be rendered.
+        :param output_file: path of the output file relative to the output directory.
+        :param template: name of the template that will be used to render the output.
+        :param context: the context that will be provided to the template.
+        :return: tuple containing the list of reasons that the output needs to be rendered (empty if it does not), and
+        the record that should be stored with record() once the output has been handled.
+        """
+        key = str(output_file)
+
+        entries = {}
+        signature = hashlib.sha256()
+        self._update_signature(signature, context, entries, set())
+
+        record = {
+            'templates': self._template_dependencies(template),
+            'configuration': self._configuration,
+            'entries': entries,
+            'signature': signature.hexdigest(),
+        }
+
+        return self._compare(key, self._previous.get(key), record), record
+
+    def record(self, output_file, record, reasons=None):
+        """Store the record of an output file that has been handled in this execution."""
+        self._current[str(output_file)] = record
+
+        if reasons:
+            self.rendered += 1
+            if self._explain:
+                self._explain(output_file, reasons)
+        else:
+            self.skipped += 1
+
+    def save(self):
+        """Write out the graph of the outputs that were handled in this execution."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('w') as graph_file:
+            json.dump({'version': GRAPH_VERSION, 'outputs': self._current}, graph_file)
+
+    def _compare(self, key, previous, record):
+        """Build the list of reasons that the output needs to be rendered again."""
+        if previous is None:
+            return ['new output']
+
+        if not (self._output_path / key).exists():
+            return ['output file is missing']
+
+        reasons = []
+
+        for template, digest in record['templates'].items():
+            if previous['templates'].get(template) != digest:
+                reasons.append('template changed: {}'.format(template))
+
+        if previous['configuration'] != record['configuration']:
+            reasons.append('configuration changed')
+
+        previous_entries = previous['entries']
+        for entry_file, digest in record['entries'].items():
+            if entry_file not in previous_entries:
+                reasons.append('entry added: {}'.format(entry_file))
+            elif previous_entries[entry_file] != digest:
+                reasons.append('entry changed: {}'.format(entry_file))
+
+        for entry_file in previous_entries:
+            if entry_file not in record['entries']:
+                reasons.append('entry removed: {}'.format(entry_file))
+
+        if not reasons and previous['signature'] != record['signature']:
+            reasons.append('context changed')
+
+        return reasons
+
+    def _template_dependencies(self, template):
+        """Find all of the templates that are used to render the template and provide their source hashes."""
+        dependencies = {}
+        pending = [template]
+
+        while pending:
+            name = pending.pop()
+            if name in dependencies:
+                continue
+
+            if name not in self._template_digests:
+                source, _, _ = self._environment.loader.get_source(self._environment, name)
+                referenced = [reference for reference in
+                              meta.find_referenced_templates(self._environment.parse(source)) if reference]
+                self._template_digests[name] = (hashlib.sha256(source.encode()).hexdigest(), referenced)
+
+            dependencies[name], referenced = self._template_digests[name]
+            pending.extend(referenced)
+
+        return dependencies
+
+    def _update_signature(self, signature, value, entries, visiting):
+        """Add the value to the signature of the context, collecting the digests of all the entries it contains."""
+        if isinstance(value, Entry):
+            file_key = str(value.file)
+            if file_key not in entries:
+                entries[file_key] = self._entry_digest(value.file) if value.file is not None else None
+            signature.update('entry:{}:{}'.format(file_key, entries[file_key]).encode())
+
+            # Reports add values to the metadata while processing, so the metadata is part of the signature as well.
+            self._update_signature(signature, value.metadata, entries, visiting)
+        elif hasattr(value, 'dependency_inputs'):
+            # Values that are expensive to walk provide the log files and the values that their content depends on.
+            signature.update(b'<')
+            for file, item in value.dependency_inputs():
+                file_key = str(file)
+                if file_key not in entries:
+                    entries[file_key] = self._entry_digest(file)
+                signature.update('entry:{}:{}'.format(file_key, entries[file_key]).encode())
+                self._update_signature(signature, item, entries, visiting)
+            signature.update(b'>')
+        elif isinstance(value, (str, bytes, int, float, bool)) or value is None:
+            signature.update(repr(value).encode())
+        elif isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+            signature.update(str(value).encode())
+        elif isinstance(value, collections.abc.Iterator):
+            # Iterators cannot be walked without being consumed, so the output will always be rendered.
+            signature.update(repr(value).encode())
+        elif id(value) in visiting:
+            signature.update(b'<recursion>')
+        elif isinstance(value, collections.abc.Mapping):
+            visiting.add(id(value))
+            signature.update(b'{')
+            for key in sorted(value, key=str):
+                signature.update(repr(key).encode())
+                self._update_signature(signature, value[key], entries, visiting)
+            signature.update(b'}')
+            visiting.discard(id(value))
+        elif isinstance(value, collections.abc.Iterable):
+            # Sets do not have a stable iteration order between executions.
+            items = sorted(value, key=repr) if isinstance(value, collections.abc.Set) else value
+
+            visiting.add(id(value))
+            signature.update(b'[')
+            for item in items:
+                self._update_signature(signature, item, entries, visiting)
+            signature.update(b']')
+            visiting.discard(id(value))
+        else:
+            signature.update(repr(value).encode())
@@ -0,0 +1,266 @@
+"""
+Persistent index of the entries that have been loaded from the log files.  Each file is keyed by its path, size,
+modification time and content hash, so files that have not changed since the last execution are provided from the
+index instead of being parsed again by their file processor.
+"""
+import hashlib
+import json
+import logging
+import pathlib
+import pickle
+import sqlite3
+import threading
+
+from autology import topics
+from autology.configuration import add_default_configuration, get_configuration, get_cache_directory
+from autology.utilities.log_file import MetaKeys
+
+logger = logging.getLogger(__name__)
+
+# Version of the table layout and stored values, changing this will cause the index to be rebuilt.
+SCHEMA_VERSION = 5
+
+# Index that has been opened for the application
+_index = None
+
+
+def load():
+    """Subscribe to the application life cycle and add default configuration values to the settings object."""
+    topics.Application.INITIALIZE.subscribe(_initialize)
+    topics.Application.FINALIZE.subscribe(_finalize)
+
+    add_default_configuration('index', {
+        # Should the entries be stored in the index between executions
+        'enabled': True,
+
+        # File name of the index, relative to the processing cache directory
+        'file': 'index.sqlite',
+    })
+
+
+def _initialize():
+    """Open the index if it has been enabled in the configuration."""
+    global _index
+
+    configuration = get_configuration()
+
+    if not configuration.index.enabled:
+        return
+
+    _index = EntryIndex(get_cache_directory() / configuration.index.file)
+
+
+def _finalize():
+    """Write out any pending changes and close the index."""
+    global _index
+
+    if _index is not None:
+        _index.close()
+        _index = None
+
+
+def get_index():
+    """Provide the index that was opened for this execution, None if the index is disabled."""
+    return _index
+
+
+def file_digest(file_path):
+    """Calculate the content hash that is used to determine if a file has been modified."""
+    with open(str(file_path), 'rb') as file_content:
+        return hashlib.sha256(file_content.read()).hexdigest()
+
+
+def _activities(entries):
+    """Collect all of the activities that are defined in the entries loaded from a file."""
+    activities = []
+    for entry in entries:
+        for activity in entry.metadata.get(MetaKeys.ACTIVITIES, None) or []:
+            if activity not in activities:
+                activities.append(activity)
+
+    return activities
+
+
+class EntryIndex:
+    """SQLite backed storage of the entries that were loaded out of each of the log files."""
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        # Content hashes of the indexed files, loaded when first requested.
+        self._digests = None
+
+        # The index is used by threads other than the one that opened it (serve --lazy processes modified files in a
+        # background thread, and the project report loads its entries while the pages are rendered), so the connection
+        # is only used while holding the lock.
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS files ('
+                                 'path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, hash TEXT, date TEXT, '
+                                 'mime_type TEXT, activities TEXT, entries BLOB)')
+
+        # Entries are stored after their datetime values have been translated into the site timezone, so the index
+        # cannot be used if that value has changed.
+        fingerprint = json.dumps({'schema': SCHEMA_VERSION, 'timezone': get_configuration().site.timezone},
+                                 sort_keys=True)
+        stored_fingerprint = self._connection.execute('SELECT value FROM settings WHERE key = ?',
+                                                      ('fingerprint',)).fetchone()
+
+        if stored_fingerprint is None or stored_fingerprint[0] != fingerprint:
+            logger.info('Entry index fingerprint changed, clearing index: {}'.format(self.path))
+            self.clear()
+            self._connection.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                                     ('fingerprint', fingerprint))
+            self._connection.commit()
+
+    def load(self, file, file_processor, record=True):
+        """
+        Provide the entries for the file, only using the file processor when the file has changed since it was last
+        indexed.
+        :param file: path to the log file
+        :param file_processor: the processor that will be used to load the file if necessary.
+        :param record: count the lookup in the hits and misses of the index.
+        :return: the same value that would be returned by the file processor's load method.
+        """
+        loaded_entries, stat, digest = self.lookup(file, file_processor.mime_type, record=record)
+        if loaded_entries is not None:
+            return loaded_entries
+
+        loaded_entries = file_processor.load(file)
+
+        if loaded_entries:
+            self.store(file, loaded_entries, file_processor.mime_type, stat=stat, digest=digest)
+
+        return loaded_entries
+
+    def lookup(self, file, mime_type, record=True):
+        """
+        Find the entries of the file in the index without loading the file.
+        :param file: path to the log file
+        :param mime_type: mime type of the file processor that would load the file.
+        :param record: count the lookup in the hits and misses of the index.
+        :return: tuple containing the entries (None if the file has changed or isn't indexed), and the stat and content
+        hash values that were calculated while checking the file, these should be provided to store().
+        """
+        key = str(file)
+        stat = file.stat()
+
+        with self._lock:
+            row = self._connection.execute('SELECT size, mtime, hash, mime_type, entries FROM files WHERE path = ?',
+                                           (key,)).fetchone()
+
+        digest = None
+        if row is not None and row[3] == mime_type:
+            size, mtime, stored_digest, mime_type, entries = row
+
+            if size == stat.st_size and mtime == stat.st_mtime_ns:
+                if record:
+                    self.hits += 1
+                return pickle.loads(entries), stat, stored_digest
+
+            # Modification time can change without modifying the content of the file (checkouts, copies), so use the
+            # content hash before deciding to parse the file again.
+            digest = file_digest(file)
+            if digest == stored_digest:
+                with self._lock:
+                    self._connection.execute('UPDATE files SET size = ?, mtime = ? WHERE path = ?',
+                                             (stat.st_size, stat.st_mtime_ns, key))
+                if record:
+                    self.hits += 1
+                return pickle.loads(entries), stat, digest
+
+        if record:
+            self.misses += 1
+        return None, stat, digest
+
+    def store(self, file, loaded_entries, mime_type, stat=None, digest=None):
+        """Store the entries that were loaded from the file into the index."""
+        if stat is None:
+            stat = file.stat()
+
+        if digest is None:
+            digest = file_digest(file)
+
+        # Entries are either a single log entry data model or a list of them.
+        entries = loaded_entries if hasattr(loaded_entries, 'append') else [loaded_entries]
+
+        row = (str(file), stat.st_size, stat.st_mtime_ns, digest, entries[0].date.isoformat(), mime_type,
+               json.dumps(_activities(entries)), pickle.dumps(loaded_entries, pickle.HIGHEST_PROTOCOL))
+
+        with self._lock:
+            if self._digests is not None:
+                self._digests[str(file)] = digest
+
+            self._connection.execute('INSERT OR REPLACE INTO files '
+                                     '(path, size, mtime, hash, date, mime_type, activities, entries) '
+                                     'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row)
+
+    def digest(self, file):
+        """Provide the content hash of the file that is stored in the index, None if it isn't indexed."""
+        with self._lock:
+            if self._digests is None:
+                self._digests = {path: digest
+                                 for path, digest in self._connection.execute('SELECT path, hash FROM files')}
+
+            return self._digests.get(str(file))
+
+    def verify(self, files):
+        """
+        Compare the contents of the index against the files provided.
+        :param files: iterable of the log files that should be stored in the index.
+        :return: list of (path, reason) tuples for all of the files that do not match the index.
+        """
+        problems = []
+        with self._lock:
+            indexed_files = {path: digest
+                             for path, digest in self._connection.execute('SELECT path, hash FROM files')}
+
+        for file in files:
+            key = str(file)
+            stored_digest = indexed_files.pop(key, None)
+
+            if stored_digest is None:
+                problems.append((key, 'not indexed'))
+            elif stored_digest != file_digest(file):
+                problems.append((key, 'modified'))
+
+        for key in sorted(indexed_files):
+            problems.append((key, 'missing'))
+
+        return problems
+
+    def prune(self, files):
+        """Remove all of the index rows that are not for one of the files provided."""
+        keep = {str(file) for file in files}
+
+        with self._lock:
+            stale = [path for path, in self._connection.execute('SELECT path FROM files') if path not in keep]
+
+            self._connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in stale])
+            self._connection.commit()
+
+        return len(stale)
+
+    def commit(self):
+        """Write out all of the pending changes to the index."""
+        with self._lock:
+            self._connection.commit()
+
+    def clear(self):
+        """Remove all of the entries that are currently stored in the index."""
+        with self._lock:
+            self._digests = None
+            self._connection.execute('DELETE FROM files')
+            self._connection.commit()
+
+    def close(self):
+        """Commit all of the pending changes and close the index."""
+        logger.debug('Entry index hits: {} misses: {}'.format(self.hits, self.misses))
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
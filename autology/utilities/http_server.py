@@ -0,0 +1,343 @@
+"""
+HTTP/1.1 server for static files that is built on asyncio.  Connections are kept alive between requests, large files are
+sent with the sendfile system call when it is available, and small files are held in a bounded memory cache so that
+frequently requested pages are not read from disk each time.  The file system is accessed from the worker threads of the
+event loop, so that slow disks do not hold up the other connections.
+"""
+import asyncio
+import collections
+import email.utils
+import html
+import logging
+import mimetypes
+import os
+import pathlib
+import posixpath
+import urllib.parse
+from http import HTTPStatus
+from stat import S_ISDIR
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of requests that are handled at the same time
+DEFAULT_WORKERS = 64
+
+# Files that are this size or smaller are stored in the memory cache
+DEFAULT_CACHE_FILE_SIZE = 64 * 1024
+
+# Maximum number of bytes that are stored in the memory cache
+DEFAULT_CACHE_SIZE = 32 * 1024 * 1024
+
+# Number of seconds that an idle connection is kept open, and the largest request header that is accepted
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADER_SIZE = 64 * 1024
+
+SERVER_NAME = 'autology'
+
+
+class _FileCache:
+    """Least recently used cache of the contents of small files, validated by their modification time and size."""
+
+    def __init__(self, max_size, max_file_size):
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self._size = 0
+        self._files = collections.OrderedDict()
+
+    def get(self, path, stat):
+        """Provide the cached content of the file if it has not been modified, otherwise None."""
+        cached = self._files.get(path)
+        if cached is None:
+            return None
+
+        if cached[0] != (stat.st_mtime_ns, stat.st_size):
+            self._remove(path)
+            return None
+
+        self._files.move_to_end(path)
+        return cached[1]
+
+    def set(self, path, stat, content):
+        """Store the content of the file, removing the least recently used files when the cache is too large."""
+        if len(content) > self.max_file_size:
+            return
+
+        self._remove(path)
+        self._files[path] = ((stat.st_mtime_ns, stat.st_size), content)
+        self._size += len(content)
+
+        while self._size > self.max_size:
+            _, (_, expired) = self._files.popitem(last=False)
+            self._size -= len(expired)
+
+    def _remove(self, path):
+        cached = self._files.pop(path, None)
+        if cached is not None:
+            self._size -= len(cached[1])
+
+
+class Request:
+    """The details of a request that were parsed from the request line and headers."""
+
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+
+    @property
+    def keep_alive(self):
+        """Determine if the client would like the connection to be kept open after the response."""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+
+class StaticFileServer:
+    """Serves the files that are contained in a root directory."""
+
+    def __init__(self, root, workers=DEFAULT_WORKERS, cache_size=DEFAULT_CACHE_SIZE,
+                 cache_file_size=DEFAULT_CACHE_FILE_SIZE, renderer=None):
+        """
+        :param root: directory containing the files that will be served.
+        :param workers: maximum number of requests that are handled at the same time.
+        :param cache_size: maximum number of bytes of file content that are held in memory.
+        :param cache_file_size: largest file that will be held in memory.
+        :param renderer: optional object that builds files when they are requested instead of reading them from the
+        root directory.  Must provide exists(path) and render(path) methods, which are provided the path relative to
+        the root directory, render is called from a worker thread and provides the content or None.
+        """
+        self.root = pathlib.Path(root).resolve()
+        self._renderer = renderer
+        self._workers = workers
+        self._worker_slots = None
+        self._cache = _FileCache(cache_size, cache_file_size)
+
+    def serve_forever(self, host, port):
+        """Start the event loop and handle connections until interrupted."""
+        asyncio.run(self.serve(host, port))
+
+    async def serve(self, host, port):
+        """Listen for connections on the host and port."""
+        self._worker_slots = asyncio.Semaphore(self._workers)
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_SIZE)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        """Handle all of the requests that are made on a connection."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send_error(writer, None, HTTPStatus.BAD_REQUEST)
+                    break
+
+                async with self._worker_slots:
+                    try:
+                        keep_alive = await self._handle_request(request, writer)
+                    except ConnectionError:
+                        raise
+                    except Exception:
+                        # Part of the response may have been written, so the connection cannot be used again.
+                        logger.exception('Cannot handle request: {} {}'.format(request.method, request.target))
+                        await self._send_error(writer, None, HTTPStatus.INTERNAL_SERVER_ERROR)
+                        break
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Read the request line and headers of the next request."""
+        data = await reader.readuntil(b'\r\n\r\n')
+        lines = data.decode('iso-8859-1').split('\r\n')
+
+        method, target, version = lines[0].split(' ')
+        if not version.startswith('HTTP/1.'):
+            raise ValueError('Unsupported protocol: {}'.format(version))
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        # Requests for static files do not have a body, discard it if one was provided.
+        content_length = int(headers.get('content-length', 0))
+        if content_length:
+            await reader.readexactly(content_length)
+
+        return Request(method, target, version, headers)
+
+    async def _handle_request(self, request, writer):
+        """Send the response to the request, returning True if the connection can be kept alive."""
+        if request.method not in ('GET', 'HEAD'):
+            await self._send_error(writer, request, HTTPStatus.NOT_IMPLEMENTED)
+            return request.keep_alive
+
+        path = self.translate_path(request.target)
+
+        if self._renderer is not None and await self._send_rendered(writer, request, path):
+            return request.keep_alive
+
+        loop = asyncio.get_running_loop()
+        try:
+            stat = await loop.run_in_executor(None, path.stat)
+        except (FileNotFoundError, NotADirectoryError):
+            await self._send_error(writer, request, HTTPStatus.NOT_FOUND)
+            return request.keep_alive
+
+        if S_ISDIR(stat.st_mode):
+            if not request.target.split('?', 1)[0].endswith('/'):
+                target = urllib.parse.urlsplit(request.target)
+                location = urllib.parse.urlunsplit(('', '', target.path + '/', target.query, target.fragment))
+                await self._send_response(writer, request, HTTPStatus.MOVED_PERMANENTLY, b'', 'text/plain',
+                                          headers={'Location': location})
+                return request.keep_alive
+
+            index = path / 'index.html'
+            try:
+                stat = await loop.run_in_executor(None, index.stat)
+            except FileNotFoundError:
+                listing = await loop.run_in_executor(None, self._list_directory, path, request)
+                await self._send_response(writer, request, HTTPStatus.OK, listing, 'text/html; charset=utf-8')
+                return request.keep_alive
+
+            path = index
+
+        await self._send_file(writer, request, path, stat)
+        return request.keep_alive
+
+    def translate_path(self, target):
+        """Translate the request target into a path within the root directory."""
+        # abandon query parameters
+        path = target.split('?', 1)[0]
+        path = path.split('#', 1)[0]
+        try:
+            path = urllib.parse.unquote(path, errors='surrogatepass')
+        except UnicodeDecodeError:
+            path = urllib.parse.unquote(path)
+        path = posixpath.normpath(path)
+
+        resolved = self.root
+        for word in filter(None, path.split('/')):
+            if os.path.dirname(word) or word in (os.curdir, os.pardir):
+                # Ignore components that are not a simple file/directory name
+                continue
+            resolved = resolved / word
+
+        return resolved
+
+    async def _send_rendered(self, writer, request, path):
+        """Send the content of the path if it is provided by the renderer, returning True if a response was sent."""
+        relative_path = path.relative_to(self.root).as_posix()
+        index_path = 'index.html' if relative_path == '.' else relative_path + '/index.html'
+
+        if request.target.split('?', 1)[0].endswith('/'):
+            relative_path = index_path
+        elif not self._renderer.exists(relative_path) and self._renderer.exists(index_path):
+            target = urllib.parse.urlsplit(request.target)
+            location = urllib.parse.urlunsplit(('', '', target.path + '/', target.query, target.fragment))
+            await self._send_response(writer, request, HTTPStatus.MOVED_PERMANENTLY, b'', 'text/plain',
+                                      headers={'Location': location})
+            return True
+
+        if not self._renderer.exists(relative_path):
+            return False
+
+        try:
+            content = await asyncio.get_running_loop().run_in_executor(None, self._renderer.render, relative_path)
+        except Exception:
+            logger.exception('Cannot render: {}'.format(relative_path))
+            await self._send_error(writer, request, HTTPStatus.INTERNAL_SERVER_ERROR)
+            return True
+
+        if content is None:
+            return False
+
+        content_type = mimetypes.guess_type(relative_path)[0] or 'application/octet-stream'
+        await self._send_response(writer, request, HTTPStatus.OK, content, content_type)
+        return True
+
+    async def _send_file(self, writer, request, path, stat):
+        """Send the content of the file, using the memory cache or sendfile when possible."""
+        headers = {'Last-Modified': email.utils.formatdate(stat.st_mtime, usegmt=True)}
+
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                if int(stat.st_mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp():
+                    await self._send_response(writer, request, HTTPStatus.NOT_MODIFIED, b'', None, headers=headers)
+                    return
+            except (TypeError, ValueError, IndexError, OverflowError):
+                pass
+
+        content_type = mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+
+        loop = asyncio.get_running_loop()
+        content = self._cache.get(path, stat)
+        if content is None and stat.st_size <= self._cache.max_file_size:
+            content = await loop.run_in_executor(None, path.read_bytes)
+            self._cache.set(path, stat, content)
+
+        if content is not None:
+            await self._send_response(writer, request, HTTPStatus.OK, content, content_type, headers=headers)
+            return
+
+        # Large files are sent directly from the file to the socket.
+        self._write_head(writer, request, HTTPStatus.OK, stat.st_size, content_type, headers)
+        await writer.drain()
+        if request.method != 'HEAD':
+            with await loop.run_in_executor(None, path.open, 'rb') as file_content:
+                await loop.sendfile(writer.transport, file_content)
+
+    async def _send_error(self, writer, request, status):
+        """Send a response describing the error."""
+        content = '<html><body><h1>{} {}</h1></body></html>'.format(status.value, status.phrase).encode()
+        await self._send_response(writer, request, status, content, 'text/html; charset=utf-8')
+
+    async def _send_response(self, writer, request, status, content, content_type, headers=None):
+        """Send the response with the content that has been loaded into memory."""
+        self._write_head(writer, request, status, len(content), content_type, headers)
+        if (request is None or request.method != 'HEAD') and status != HTTPStatus.NOT_MODIFIED:
+            writer.write(content)
+        await writer.drain()
+
+    def _write_head(self, writer, request, status, content_length, content_type, headers=None):
+        """Write the status line and headers of a response."""
+        keep_alive = request is not None and request.keep_alive
+        logger.info('{} {} {}'.format(request.method if request else '-', request.target if request else '-',
+                                      status.value))
+
+        lines = ['HTTP/1.1 {} {}'.format(status.value, status.phrase),
+                 'Server: {}'.format(SERVER_NAME),
+                 'Date: {}'.format(email.utils.formatdate(usegmt=True)),
+                 'Connection: {}'.format('keep-alive' if keep_alive else 'close')]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines.append('Content-Length: {}'.format(content_length))
+        if content_type:
+            lines.append('Content-Type: {}'.format(content_type))
+        for name, value in (headers or {}).items():
+            lines.append('{}: {}'.format(name, value))
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1'))
+
+    def _list_directory(self, path, request):
+        """Build a listing of the contents of a directory that does not have an index file."""
+        display_path = html.escape(urllib.parse.unquote(request.target.split('?', 1)[0]))
+        items = []
+        for entry in sorted(path.iterdir(), key=lambda item: item.name.lower()):
+            name = entry.name + ('/' if entry.is_dir() else '')
+            items.append('<li><a href="{}">{}</a></li>'.format(urllib.parse.quote(name), html.escape(name)))
+
+        return ('<!DOCTYPE html><html><head><title>Directory listing for {0}</title></head><body>'
+                '<h1>Directory listing for {0}</h1><hr><ul>{1}</ul><hr></body></html>'.format(display_path,
+                                                                                           ''.join(items))).encode()
@@ -1,15 +1,29 @@
 """Utilities for processing log files."""
+import bisect
+import calendar
+import collections.abc
+import concurrent.futures
+import datetime
+import functools
+import heapq
 import mimetypes
+import os
 import pathlib
+import re
 import shutil
 import logging
+import time
+import traceback
+
+import frontmatter
+import yaml
 
-import pytz
 from collections import namedtuple
 from semantic_version import Version
 
-from autology.configuration import get_configuration, get_configuration_root
+from autology.configuration import add_default_configuration, get_configuration, get_configuration_root
 from autology import topics
+from autology.utilities import datetimes
 
 
 logger = logging.getLogger(__name__)
@@ -32,6 +46,17 @@ class MetaKeys:
         FILE_VERSION = 'file_definition'
 
 
+# Version of the files that do not define the file version they were written with
+UNVERSIONED = Version('0.0.0')
+
+# Size of the reads, and the largest front matter block that is read, when sniffing the file version of a log file
+SNIFF_CHUNK_SIZE = 4096
+SNIFF_LIMIT = 64 * 1024
+
+# Same boundary that is used by the front matter library
+_FRONT_MATTER_BOUNDARY = re.compile(rb'^-{3,}[ \t\r]*$', re.MULTILINE)
+_BYTE_ORDER_MARK = b'\xef\xbb\xbf'
+
 # File Processor map and definition object.
 _file_processors = {}
 FileProcessor = namedtuple('FileProcessor', 'mime_type load write')
@@ -40,6 +65,359 @@ FileProcessor = namedtuple('FileProcessor', 'mime_type load write')
 Entry = namedtuple('Entry', 'date mime_type metadata content file python')
 
 
+# Location of the content of a LazyEntry in its log file.  The size and modification time of the file when it was loaded
+# are part of the key of the content cache.  parser is a module level function that translates the content into the
+# python value of the entry, None if the python value is the content.
+ContentReference = namedtuple('ContentReference', 'offset size mtime parser')
+
+# Number of entry contents that are kept in memory after they have been read
+CONTENT_CACHE_SIZE = 256
+
+
+class ParsedContent:
+    """
+    Python value of a LazyEntry that is parsed from its content when it is first accessed.  Each entry has its own
+    value, as reports can modify the value they are provided.
+    """
+    __slots__ = ('parsed', 'value')
+
+    def __init__(self):
+        self.parsed = False
+        self.value = None
+
+    def __reduce__(self):
+        """Only the reference to the content is stored, the value is parsed again when the entry is loaded."""
+        return ParsedContent, ()
+
+
+# Values that are shared by the compact metadata of all of the entries, the activities, locations, agent definitions
+# and key orders are repeated by most of the entries of a log, so each distinct value is only stored once.
+_shared_values = {}
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# Number of the datetime values built from compact metadata that are kept in memory
+DATE_CACHE_SIZE = 1024
+
+
+def _share(value):
+    """Provide the instance of the value that is shared by all of the compact metadata."""
+    return _shared_values.setdefault(value, value)
+
+
+def _to_epoch(value):
+    """
+    Translate a datetime value into epoch seconds and the name of its timezone.
+    :return: tuple of the seconds and timezone name, None if the value cannot be built again from them without loss.
+    """
+    if type(value) is not datetime.datetime or value.microsecond or getattr(value.tzinfo, 'zone', None) is None:
+        return None
+
+    seconds = calendar.timegm(value.utctimetuple())
+    zone = _share(value.tzinfo.zone)
+
+    rebuilt = _from_epoch(seconds, zone)
+    if rebuilt.tzinfo is not value.tzinfo or rebuilt != value:
+        return None
+
+    return seconds, zone
+
+
+@functools.lru_cache(maxsize=None)
+def _zone_transitions(zone):
+    """
+    Provide the UTC offsets of the timezone, in the same form as they are found by pytz when translating from UTC.
+    :param zone: name of the timezone.
+    :return: tuple of the epoch seconds at which each offset starts, and the UTC offset in seconds and the epoch in
+    local time of each offset.
+    """
+    timezone = datetimes.get_timezone(zone)
+
+    if not hasattr(timezone, '_utc_transition_times'):
+        offset = timezone.utcoffset(_EPOCH)
+        return [0], [(int(offset.total_seconds()), _EPOCH.replace(tzinfo=timezone))]
+
+    starts = [calendar.timegm(transition.utctimetuple()) for transition in timezone._utc_transition_times]
+    offsets = [(int(info[0].total_seconds()), _EPOCH.replace(tzinfo=timezone._tzinfos[info]))
+               for info in timezone._transition_info]
+
+    return starts, offsets
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _from_epoch(seconds, zone):
+    """
+    Build the timezone aware datetime value of the epoch seconds.  The values are immutable, so the values that were
+    built recently are shared by the reports that access the time of the same entry.
+    """
+    starts, offsets = _zone_transitions(zone)
+    offset, local_epoch = offsets[max(0, bisect.bisect_right(starts, seconds) - 1)]
+
+    return local_epoch + datetime.timedelta(seconds=seconds + offset)
+
+
+class CompactMetadata(collections.abc.MutableMapping):
+    """
+    Front matter of an entry that stores the values defined by most entries in slots instead of a dictionary.  The
+    time and end time are stored as epoch seconds along with the name of their timezone, and the location, activities
+    and agent definition are shared with the other entries that define the same values.  All other values, and the
+    values that cannot be stored without loss, are kept in an overflow dictionary.
+
+    The values are provided in the form they were loaded in: the datetime values are built when they are accessed, and
+    the activities and agent definition are provided as a new list and dictionary, so modifying them will not modify
+    the metadata.
+    """
+    __slots__ = ('_keys', '_start', '_end', '_zone', '_location', '_activities', '_agent', '_overflow')
+
+    def __init__(self, metadata=()):
+        self._keys = ()
+        self._start = self._end = self._zone = None
+        self._location = self._activities = self._agent = None
+        self._overflow = None
+
+        self.update(metadata)
+
+    def __getitem__(self, key):
+        if key == MetaKeys.TIME:
+            if self._start is not None:
+                return _from_epoch(self._start, self._zone)
+        elif key == MetaKeys.END_TIME:
+            if self._end is not None:
+                return _from_epoch(self._end, self._zone)
+        elif key == MetaKeys.LOCATION:
+            if self._location is not None:
+                return self._location
+        elif key == MetaKeys.ACTIVITIES:
+            if self._activities is not None:
+                return list(self._activities)
+        elif key == MetaKeys.AGENT_DEFINITION:
+            if self._agent is not None:
+                return dict(self._agent)
+
+        if self._overflow is not None and key in self._overflow:
+            return self._overflow[key]
+
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._keys:
+            self._keys = _share(self._keys + (key,))
+
+        self._discard(key)
+        if not self._store(key, value):
+            if self._overflow is None:
+                self._overflow = {}
+            self._overflow[key] = value
+
+    def __delitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+
+        self._discard(key)
+        self._keys = _share(tuple(existing for existing in self._keys if existing != key))
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return _restore_metadata, (self._keys, self._start, self._end, self._zone, self._location, self._activities,
+                                   self._agent, self._overflow)
+
+    def _store(self, key, value):
+        """Store the value in its slot, returning False if it must be stored in the overflow dictionary."""
+        if key == MetaKeys.TIME or key == MetaKeys.END_TIME:
+            epoch = _to_epoch(value)
+
+            # Both of the times share the timezone name
+            other = self._end if key == MetaKeys.TIME else self._start
+            if epoch is None or (other is not None and epoch[1] != self._zone):
+                return False
+
+            if key == MetaKeys.TIME:
+                self._start, self._zone = epoch
+            else:
+                self._end, self._zone = epoch
+        elif key == MetaKeys.LOCATION:
+            if type(value) is not str:
+                return False
+            self._location = _share(value)
+        elif key == MetaKeys.ACTIVITIES:
+            if type(value) is not list or not all(type(activity) is str for activity in value):
+                return False
+            self._activities = _share(tuple(_share(activity) for activity in value))
+        elif key == MetaKeys.AGENT_DEFINITION:
+            if type(value) is not dict or not all(type(name) is str and type(definition) is str
+                                                  for name, definition in value.items()):
+                return False
+            self._agent = _share(tuple(value.items()))
+        else:
+            return False
+
+        return True
+
+    def _discard(self, key):
+        """Remove the value of the key from its slot or the overflow dictionary."""
+        if key == MetaKeys.TIME:
+            self._start = None
+        elif key == MetaKeys.END_TIME:
+            self._end = None
+        elif key == MetaKeys.LOCATION:
+            self._location = None
+        elif key == MetaKeys.ACTIVITIES:
+            self._activities = None
+        elif key == MetaKeys.AGENT_DEFINITION:
+            self._agent = None
+
+        if self._start is None and self._end is None:
+            self._zone = None
+
+        if self._overflow is not None:
+            self._overflow.pop(key, None)
+            if not self._overflow:
+                self._overflow = None
+
+
+def entry_timestamp(entry):
+    """
+    Provide the epoch seconds of the time of an entry, used to order the entries without building the datetime value
+    of the entries whose metadata is stored as CompactMetadata.
+    """
+    metadata = entry.metadata
+    if isinstance(metadata, CompactMetadata) and metadata._start is not None:
+        return metadata._start
+
+    return entry.date.timestamp()
+
+
+def _restore_metadata(keys, start, end, zone, location, activities, agent, overflow):
+    """Unpickle compact metadata, sharing its values with the metadata that has already been loaded."""
+    metadata = CompactMetadata.__new__(CompactMetadata)
+    metadata._keys = _share(keys)
+    metadata._start = start
+    metadata._end = end
+    metadata._zone = _share(zone) if zone is not None else None
+    metadata._location = _share(location) if location is not None else None
+    metadata._activities = _share(activities) if activities is not None else None
+    metadata._agent = _share(agent) if agent is not None else None
+    metadata._overflow = overflow
+
+    return metadata
+
+
+class LazyEntry(Entry):
+    """
+    Entry whose metadata is loaded when the log file is loaded, but whose content is read from the log file when it is
+    accessed.  Reports keep references to the entries until all of the files have been processed, so only the metadata
+    of the entries is held in memory.  The content field of the tuple stores the ContentReference of the content, the
+    python field stores the ParsedContent of entries whose content is parsed, and when the metadata is stored as
+    CompactMetadata the date field is None and the date is provided by the metadata.
+    """
+    __slots__ = ()
+
+    @property
+    def date(self):
+        date = tuple.__getitem__(self, 0)
+        return date if date is not None else self.metadata[MetaKeys.TIME]
+
+    @property
+    def content(self):
+        reference = tuple.__getitem__(self, 3)
+        if not isinstance(reference, ContentReference):
+            return reference
+
+        try:
+            return _read_content(self.file, reference.offset, reference.size, reference.mtime)
+        except _ContentModified:
+            # The offset of the content is only valid for the file that the metadata was loaded from, so the whole
+            # file must be loaded to find the content.
+            logger.debug('Log file modified since it was loaded: {}'.format(self.file))
+            with open(str(self.file)) as log_content:
+                return frontmatter.load(log_content, handler=datetimes.FRONT_MATTER_HANDLER).content
+
+    @property
+    def python(self):
+        python = tuple.__getitem__(self, 5)
+        reference = tuple.__getitem__(self, 3)
+        if isinstance(python, ParsedContent):
+            if not python.parsed:
+                python.value = reference.parser(self.content)
+                python.parsed = True
+            return python.value
+
+        if python is not None or not isinstance(reference, ContentReference):
+            return python
+
+        return self.content
+
+    def _asdict(self):
+        """Overridden to provide the content instead of its reference."""
+        return dict(zip(self._fields, (self.date, self.mime_type, self.metadata, self.content, self.file,
+                                       self.python)))
+
+
+class _ContentModified(Exception):
+    """Raised when the log file has been modified since the reference to its content was created."""
+
+
+@functools.lru_cache(maxsize=CONTENT_CACHE_SIZE)
+def _read_content(file, offset, size, mtime):
+    """
+    Read the content that follows the front matter of a log file, the same value as is provided by frontmatter.
+    :raise _ContentModified: if the size or modification time of the file no longer match the values provided.
+    """
+    with open(str(file), 'rb') as log_content:
+        stat = os.fstat(log_content.fileno())
+        if stat.st_size != size or stat.st_mtime_ns != mtime:
+            raise _ContentModified(file)
+
+        log_content.seek(offset)
+        content = log_content.read().decode('utf-8')
+
+    # Match the universal newlines of files that are opened in text mode
+    return content.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def load_lazy_entry(path, mime_type, parser=None, compact=True):
+    """
+    Load the front matter of a log file into a LazyEntry, without reading the content that follows it.
+    :param path: path to the log file.
+    :param mime_type: mime type of the entry.
+    :param parser: module level function that translates the content into the python value of the entry, None if the
+    python value is the content.
+    :param compact: store the metadata as CompactMetadata instead of a dictionary.
+    :return: the LazyEntry, None if the file doesn't start with a front matter block that can be read on its own.
+    """
+    front_matter = _split_front_matter(path)
+    if front_matter is None:
+        return None
+
+    front_matter, offset, stat = front_matter
+
+    metadata = datetimes.FRONT_MATTER_HANDLER.load(front_matter)
+    if not isinstance(metadata, dict):
+        metadata = {}
+
+    date = metadata[MetaKeys.TIME]
+    if compact:
+        metadata = CompactMetadata(metadata)
+
+        # The date is built from the metadata when it is accessed, unless the time could not be stored compactly.
+        if metadata._start is not None:
+            date = None
+
+    return LazyEntry(date, mime_type, metadata, ContentReference(offset, stat.st_size, stat.st_mtime_ns, parser), path,
+                     ParsedContent() if parser is not None else None)
+
+
 def rebuild_entry(entry, **kwargs):
     """Create a new entry based off an original entry and the kwargs that are defined to override the values."""
     dictionary = entry._asdict()
@@ -76,31 +454,17 @@ def get_file_processor(file=None, mime_type=None):
 def process_datetimes(dictionary):
     """
     Translate all of the datetime objects that are stored in the front matter and make them timezone aware.
-    :param dictionary: the dictionary containing the values to process.  This will need to be called recursively on all
-    dictionaries contained within.
-    :return:
+    :param dictionary: the dictionary containing the values to process.  All dictionaries contained within will be
+    processed as well.
+    :return: the dictionary
     """
-    for key in dictionary.keys():
-        if hasattr(dictionary[key], 'tzinfo') and dictionary[key].tzinfo is None:
-            # All of the values read in are parsed into UTC time, yaml does this conversion for us when there is
-            # timezone information
-            utc_value = pytz.utc.localize(dictionary[key])
-            site_timezone = pytz.timezone(get_configuration().site.timezone)
-            dictionary[key] = utc_value.astimezone(site_timezone)
-        elif hasattr(dictionary[key], 'keys'):
-            process_datetimes(dictionary[key])
-
-    return dictionary
+    # All of the values read in are parsed into UTC time, yaml does this conversion for us when there is timezone
+    # information
+    return datetimes.normalize_datetimes(dictionary)
 
 
-def walk_log_files(directories):
-    """Generator that will walk through all of the log files and yield each file in datetime order."""
-    log_files = []
-
-    _LogEntry = namedtuple('LogEntry', 'date file file_processor')
-
-    # Need to find all of the files that are stored in the input_files directories in order to start building the
-    # reports that will be used to generate the static log files.
+def find_log_files(directories):
+    """Generator that will yield each of the files in the directories that has a file processor defined for it."""
     for input_path in directories:
         search_path = pathlib.Path(input_path)
 
@@ -110,27 +474,69 @@ def walk_log_files(directories):
                 file_processor = get_file_processor(file=file_component)
 
                 if file_processor:
-                    try:
-                        entries = file_processor.load(file_component)
-                    except KeyError as e:
-                        logger.exception('Error processing file: {}'.format(file_component))
-                        continue
+                    yield file_component, file_processor
 
-                    if entries:
-                        # entries is either a log entry data model or a list of them.
-                        try:
-                            entry_time = entries.date
-                        except AttributeError:
-                            entry_time = entries[0].date
 
-                        log_files.append(_LogEntry(entry_time, file_component, file_processor))
+def walk_log_files(directories, entry_index=None, retain_limit=None, jobs=1, statistics=None):
+    """
+    Generator that will walk through all of the log files and yield each file in datetime order.  Each file is only
+    loaded once, the entries are kept in memory until they are yielded.
+    :param directories: the log directories that will be searched for files.
+    :param entry_index: optional autology.utilities.entry_index.EntryIndex that will be used to load the files that
+    have not changed since the last execution.
+    :param retain_limit: maximum number of loaded files that will be kept in memory while sorting, the files with the
+    latest dates will be loaded again when they are yielded.  None will keep all of the files in memory.
+    :param jobs: number of processes that will be used to load the log files.
+    :param statistics: optional dictionary that is updated with the number of files that were parsed by their file
+    processor (files_parsed), and that were provided by the entry index (index_hits), once the files have been loaded.
+    Files that are loaded again because they were not retained are not counted.
+    """
+    log_files = []
+    loading_statistics = {'files_parsed': 0, 'index_hits': 0}
 
-    log_files = sorted(log_files, key=lambda x: x.date)
+    # Heap of the retained log files, ordered so that the file with the latest date is evicted first.
+    retained = []
+
+    _LogEntry = namedtuple('LogEntry', 'timestamp position file file_processor')
+
+    # Need to find all of the files that are stored in the input_files directories in order to start building the
+    # reports that will be used to generate the static log files.
+    found_files = list(find_log_files(directories))
+
+    loaded_files = {}
+    for position, file_component, file_processor, entries in _load_log_files(found_files, entry_index, jobs,
+                                                                             loading_statistics):
+        if entries:
+            # entries is either a log entry data model or a list of them.
+            try:
+                entry_time = entry_timestamp(entries)
+            except AttributeError:
+                entry_time = entry_timestamp(entries[0])
+
+            log_files.append(_LogEntry(entry_time, position, file_component, file_processor))
+
+            # Keep the loaded entries so that the file doesn't need to be loaded again when it is yielded.
+            loaded_files[file_component] = entries
+            heapq.heappush(retained, (-entry_time, position, file_component))
+            if retain_limit is not None and len(retained) > retain_limit:
+                loaded_files.pop(heapq.heappop(retained)[2])
+
+    # Files that have been removed from the log directories no longer need to be stored in the index
+    if entry_index is not None:
+        entry_index.prune(file_component for file_component, _ in found_files)
+
+    # Files are loaded in the order that they are completed, so files with the same time are in the order found.
+    log_files = sorted(log_files, key=lambda x: (x.timestamp, x.position))
+
+    if statistics is not None:
+        statistics.update(loading_statistics)
 
     for log_entry in log_files:
-        # Load up the content of the file and provide all of the documents that are contained with the metadata, some
-        # files provide multiple contents, so need to be able to handle that and yield them appropriately.
-        loaded_entries = log_entry.file_processor.load(log_entry.file)
+        # Provide all of the documents that are contained with the metadata, some files provide multiple contents, so
+        # need to be able to handle that and yield them appropriately.  Files that were not retained are loaded again.
+        loaded_entries = loaded_files.pop(log_entry.file, None)
+        if loaded_entries is None:
+            loaded_entries = _load_log_file(log_entry.file, log_entry.file_processor, entry_index)
 
         if hasattr(loaded_entries, 'append'):
             for entry in loaded_entries:
@@ -139,6 +545,248 @@ def walk_log_files(directories):
             yield loaded_entries
 
 
+def _load_log_file(file, file_processor, entry_index=None, statistics=None):
+    """
+    Load the entries of a log file, using the entry index if it is available.
+    :param statistics: dictionary that counts the files that were parsed and that were provided by the index.  Files
+    that are loaded without it have already been counted, so they are not counted by the index either.
+    """
+    if entry_index is None:
+        if statistics is not None:
+            statistics['files_parsed'] += 1
+        return file_processor.load(file)
+
+    if statistics is None:
+        return entry_index.load(file, file_processor, record=False)
+
+    entries, stat, digest = entry_index.lookup(file, file_processor.mime_type)
+    if entries is not None:
+        statistics['index_hits'] += 1
+        return entries
+
+    statistics['files_parsed'] += 1
+    entries = file_processor.load(file)
+    if entries:
+        entry_index.store(file, entries, file_processor.mime_type, stat=stat, digest=digest)
+
+    return entries
+
+
+def _load_log_files(found_files, entry_index, jobs, statistics):
+    """
+    Generator that loads each of the found files, yielding the position of the file in the found files, the file, file
+    processor and entries.  When jobs is greater than one, the files that are not provided by the index are loaded by a
+    pool of processes, and the files are yielded as they are loaded instead of in the order they were found, so that
+    the entries are not held in memory until the earlier files have been loaded.
+    """
+    if jobs <= 1:
+        for position, (file_component, file_processor) in enumerate(found_files):
+            try:
+                entries = _load_log_file(file_component, file_processor, entry_index, statistics)
+            except KeyError:
+                logger.exception('Error processing file: {}'.format(file_component))
+                continue
+
+            yield position, file_component, file_processor, entries
+
+        return
+
+    # Chunk the files so that each task is large enough to cover the cost of sending it to a process, and only keep
+    # enough chunks in progress to keep the processes busy.
+    chunk_size = max(1, min(64, len(found_files) // (jobs * 4)))
+    chunk_limit = jobs * 2
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_worker,
+                                                initargs=(get_configuration().toDict(),
+                                                          dict(_file_processors))) as executor:
+        chunks = {}
+        pending = []
+        for position, (file_component, file_processor) in enumerate(found_files):
+            # Files that are provided by the index do not need to be sent to the pool.
+            stat = digest = None
+            if entry_index is not None:
+                entries, stat, digest = entry_index.lookup(file_component, file_processor.mime_type)
+                if entries is not None:
+                    statistics['index_hits'] += 1
+                    yield position, file_component, file_processor, entries
+                    continue
+
+            pending.append((position, file_component, file_processor, stat, digest))
+            if len(pending) < chunk_size:
+                continue
+
+            chunks[executor.submit(_load_chunk, _chunk_arguments(pending))] = pending
+            pending = []
+
+            if len(chunks) >= chunk_limit:
+                done, _ = concurrent.futures.wait(chunks, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield from _loaded_chunk(chunks.pop(future), future.result(), entry_index, statistics)
+
+        if pending:
+            chunks[executor.submit(_load_chunk, _chunk_arguments(pending))] = pending
+
+        for future in concurrent.futures.as_completed(list(chunks)):
+            yield from _loaded_chunk(chunks.pop(future), future.result(), entry_index, statistics)
+
+
+def _chunk_arguments(chunk):
+    """Provide the files and mime types of the chunk that are sent to the loading processes."""
+    return [(file_component, file_processor.mime_type) for _, file_component, file_processor, _, _ in chunk]
+
+
+def _loaded_chunk(chunk, loaded_chunk, entry_index, statistics):
+    """Generator that stores the files that were loaded by a process in the index, and yields them."""
+    for (position, file_component, file_processor, stat, digest), (entries, error, _) in zip(chunk, loaded_chunk):
+        statistics['files_parsed'] += 1
+        if error:
+            logger.error('Error processing file: {}\n{}'.format(file_component, error))
+            continue
+
+        if entries and entry_index is not None:
+            entry_index.store(file_component, entries, file_processor.mime_type, stat=stat, digest=digest)
+
+        yield position, file_component, file_processor, entries
+
+
+def _initialize_worker(settings, file_processors):
+    """Configure a loading process with the settings and file processors of the parent process."""
+    for key, value in settings.items():
+        add_default_configuration(key, value)
+
+    _file_processors.update(file_processors)
+
+
+def _load_chunk(chunk):
+    """
+    Load each of the files in the chunk, providing tuples of the loaded entries, any error that was raised and the
+    seconds taken to load the file, which are recorded by autology.profiling in the parent process.
+    """
+    results = []
+    for file_component, mime_type in chunk:
+        start_time = time.perf_counter()
+        try:
+            entries, error = get_file_processor(mime_type=mime_type).load(file_component), None
+        except KeyError:
+            entries, error = None, traceback.format_exc()
+        results.append((entries, error, time.perf_counter() - start_time))
+
+    return results
+
+
+def read_front_matter(path, chunk_size=SNIFF_CHUNK_SIZE, limit=SNIFF_LIMIT):
+    """
+    Read the YAML front matter block at the beginning of a log file, without reading the content that follows it.
+    :param path: path to the log file.
+    :param chunk_size: number of bytes that are read at a time.
+    :param limit: largest front matter block that will be read.
+    :return: the text of the front matter block, None if the file doesn't start with a front matter block or it is
+    larger than the limit.
+    """
+    front_matter = _split_front_matter(path, chunk_size, limit)
+    return front_matter[0] if front_matter is not None else None
+
+
+def _split_front_matter(path, chunk_size=SNIFF_CHUNK_SIZE, limit=SNIFF_LIMIT):
+    """
+    Read the front matter block at the beginning of a log file.
+    :return: tuple of the front matter text, the byte offset of the content that follows it and the stat of the file,
+    None if the file doesn't start with a front matter block or it is larger than the limit.
+    """
+    with open(str(path), 'rb') as log_content:
+        data = log_content.read(chunk_size)
+
+        # Offsets within data are relative to the end of the byte order mark
+        start = 0
+        if data.startswith(_BYTE_ORDER_MARK):
+            start = len(_BYTE_ORDER_MARK)
+            data = data[start:]
+
+        opening = _FRONT_MATTER_BOUNDARY.match(data)
+        if opening is None:
+            return None
+
+        search_start = opening.end()
+        while True:
+            closing = _FRONT_MATTER_BOUNDARY.search(data, search_start)
+
+            # The boundary could continue in the next chunk, so only accept it when it is followed by another byte
+            at_end = closing is not None and closing.end() == len(data)
+            if closing is not None and not at_end:
+                break
+
+            chunk = log_content.read(chunk_size) if len(data) < limit else b''
+            if not chunk:
+                if not at_end:
+                    return None
+                break
+
+            # Search again from the start of the last line, which may not have been complete
+            search_start = max(opening.end(), data.rfind(b'\n') + 1)
+            data += chunk
+
+        return (data[opening.end():closing.start()].decode('utf-8'), start + closing.end(),
+                os.fstat(log_content.fileno()))
+
+
+def sniff_file_version(path):
+    """
+    Determine the file version of a log file from its front matter, without loading the rest of the file.  The agent
+    definition is found by scanning the lines of the front matter, which is only parsed as YAML when the definition is
+    not written in the block style that is used by the file processors.
+    :param path: path to the log file.
+    :return: the semantic_version.Version of the file, UNVERSIONED if it doesn't define one, or None if the file doesn't
+    have a front matter block or the version cannot be parsed.
+    """
+    front_matter = read_front_matter(path)
+    if front_matter is None:
+        return None
+
+    agent_key = MetaKeys.AGENT_DEFINITION + ':'
+    version_key = MetaKeys.Agent.FILE_VERSION + ':'
+
+    lines = front_matter.splitlines()
+    for position, line in enumerate(lines):
+        if not line.startswith(agent_key):
+            continue
+
+        if line[len(agent_key):].split('#', 1)[0].strip():
+            break
+
+        # Find the file version in the block of indented lines that follow the agent definition key
+        child_indent = None
+        for child in lines[position + 1:]:
+            stripped = child.lstrip(' ')
+            if not stripped or stripped.startswith('#'):
+                continue
+
+            indent = len(child) - len(stripped)
+            if indent == 0:
+                break
+            if child_indent is None:
+                child_indent = indent
+
+            if indent == child_indent and stripped.startswith(version_key):
+                try:
+                    return Version.coerce(stripped[len(version_key):].split('#', 1)[0].strip().strip('\'"'))
+                except ValueError:
+                    return None
+
+        return UNVERSIONED
+    else:
+        if MetaKeys.AGENT_DEFINITION not in front_matter:
+            return UNVERSIONED
+
+    # The agent definition is written in a different style, so parse the front matter.
+    try:
+        metadata = yaml.load(front_matter, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+        return Version.coerce(str(metadata[MetaKeys.AGENT_DEFINITION][MetaKeys.Agent.FILE_VERSION]))
+    except (KeyError, TypeError):
+        return UNVERSIONED
+    except (ValueError, yaml.YAMLError):
+        return None
+
+
 def find_file(file_path):
     """Iterate through all of the log defined paths in order to find the file pointed to by a relative path."""
     configuration_settings = get_configuration()
@@ -0,0 +1,150 @@
+"""
+History of the metrics that are recorded by each execution of the generate command.  Each execution appends a record to
+a JSON lines file in the cache directory, so gradual changes in the time taken to generate the site can be found as the
+log grows.
+"""
+import contextlib
+import datetime
+import json
+import logging
+import sys
+import time
+
+from autology import profiling
+from autology.configuration import add_default_configuration, get_configuration, get_cache_directory
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def load():
+    """Add the default configuration values to the settings object."""
+    add_default_configuration('metrics', {
+        # Should the metrics of each execution be stored
+        'enabled': True,
+
+        # File name of the history, relative to the processing cache directory
+        'file': 'metrics.jsonl',
+
+        # Number of records that are kept in the file, the oldest records are removed.
+        'keep': 1000,
+
+        # Number of the most recent records that are provided to the reports
+        'history': 30,
+    })
+
+
+class RunMetrics:
+    """Metrics of a single execution, the phases are also recorded by autology.profiling when it is enabled."""
+
+    def __init__(self):
+        self.date = datetime.datetime.now(datetime.timezone.utc)
+        self.phases = {}
+        self.values = {}
+        self._start_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager that records the number of seconds taken by the block."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start_time)
+
+    def add_phase(self, name, elapsed):
+        """Record the number of seconds taken by a phase that was timed by the caller."""
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+        profiling.record('phase', name, elapsed)
+
+    def to_dict(self):
+        """Provide the record that is stored in the history."""
+        record = {
+            'date': self.date.isoformat(),
+            'duration': round(time.perf_counter() - self._start_time, 6),
+            'phases': {name: round(elapsed, 6) for name, elapsed in self.phases.items()},
+            'peak_rss': peak_rss(),
+        }
+        record.update(self.values)
+
+        return record
+
+
+def peak_rss():
+    """Provide the largest resident set size of the process in bytes, None when it cannot be determined."""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports the value in kilobytes, macOS in bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _history_path():
+    configuration = get_configuration()
+    metrics_settings = configuration.get('metrics')
+    if not metrics_settings or not metrics_settings.enabled:
+        return None
+
+    return get_cache_directory() / metrics_settings.file
+
+
+def _read_records(path):
+    """Read all of the records in the file, ignoring lines that cannot be parsed."""
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return []
+
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            logger.warning('Ignoring invalid metrics record in: {}'.format(path))
+
+    return records
+
+
+def get_history(limit=None):
+    """
+    Provide the records of the previous executions, oldest first.
+    :param limit: number of the most recent records to provide, defaults to the metrics.history configuration value.
+    :return: list of dictionaries, empty when the metrics are disabled.
+    """
+    path = _history_path()
+    if path is None:
+        return []
+
+    if limit is None:
+        limit = get_configuration().metrics.history
+
+    records = _read_records(path)
+    return records[-limit:] if limit else records
+
+
+def append(run_metrics):
+    """Append the record of the execution to the history, removing the oldest records beyond metrics.keep."""
+    path = _history_path()
+    if path is None:
+        return
+
+    keep = get_configuration().metrics.keep
+    line = json.dumps(run_metrics.to_dict(), sort_keys=True)
+
+    with path.open('a') as history_file:
+        history_file.write(line + '\n')
+
+    # The file is only rewritten once it holds twice as many records as are kept, so most executions only append.
+    if keep:
+        with path.open('rb') as history_file:
+            record_count = sum(1 for _ in history_file)
+
+        if record_count > keep * 2:
+            records = _read_records(path)
+            path.write_text(''.join(json.dumps(record, sort_keys=True) + '\n' for record in records[-keep:]))
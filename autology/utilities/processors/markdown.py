@@ -6,7 +6,7 @@ This will be registered in the generator as part of the report initialization pl
 """
 import frontmatter
 
-from autology.utilities import log_file
+from autology.utilities import datetimes, log_file
 
 MIME_TYPE = 'text/markdown'
 
@@ -18,10 +18,13 @@ def load_file(path):
     :param path:
     :return:
     """
-    with path.open() as loaded_file:
-        entry = frontmatter.load(loaded_file)
+    # The content is read from the file when it is used by the reports.
+    entry = log_file.load_lazy_entry(path, MIME_TYPE)
+    if entry is not None:
+        return entry
 
-    log_file.process_datetimes(entry.metadata)
+    with path.open() as loaded_file:
+        entry = frontmatter.load(loaded_file, handler=datetimes.FRONT_MATTER_HANDLER)
 
     return log_file.Entry(entry.metadata[log_file.MetaKeys.TIME], MIME_TYPE, entry.metadata, entry.content, path,
                           entry.content)
@@ -7,7 +7,7 @@ import frontmatter
 import yaml
 
 from autology.utilities.processors.markdown import write_file
-from autology.utilities import log_file
+from autology.utilities import datetimes, log_file
 
 MIME_TYPE = 'application/x-yaml'
 
@@ -18,13 +18,21 @@ def load_file(path):
     :param path:
     :return:
     """
-    with path.open() as loaded_file:
-        post = frontmatter.load(loaded_file)
+    # The content and documents are read from the file when they are used by the reports.
+    entry = log_file.load_lazy_entry(path, MIME_TYPE, parser=load_documents)
+    if entry is not None:
+        return entry
 
-    post.metadata = log_file.process_datetimes(post.metadata)
+    with path.open() as loaded_file:
+        post = frontmatter.load(loaded_file, handler=datetimes.FRONT_MATTER_HANDLER)
 
     return log_file.Entry(post[log_file.MetaKeys.TIME], MIME_TYPE, post.metadata, post.content, path,
-                          [content for content in yaml.load_all(post.content) if content])
+                          load_documents(post.content))
+
+
+def load_documents(content):
+    """Translate the content of a YAML file into the list of documents that it contains."""
+    return [document for document in yaml.load_all(content) if document]
 
 
 def register():
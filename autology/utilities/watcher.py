@@ -0,0 +1,269 @@
+"""
+Watches directories and files for modifications.  Uses inotify when it is available, otherwise falls back to polling the
+modification times of the files.  Modifications are collected until the file system has been quiet for the debounce
+period, so that a batch of changes (a checkout, an editor saving through a temporary file) is reported together.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import pathlib
+import select
+import struct
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Number of seconds without modifications before a batch of modifications is reported
+DEFAULT_DEBOUNCE = 0.5
+
+# Number of seconds between checks of the modification times when polling
+DEFAULT_POLL_INTERVAL = 1.0
+
+# inotify event flags, see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE |
+               _IN_DELETE_SELF | _IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def create_watcher(paths, ignore=(), debounce=DEFAULT_DEBOUNCE, force_polling=False):
+    """
+    Create the best watcher that is available on this platform.
+    :param paths: directories (watched recursively) and files that should be watched.
+    :param ignore: directories whose contents are never reported, such as the output directory.
+    :param debounce: number of seconds without modifications before the modifications are reported.
+    :param force_polling: always use the polling watcher.
+    """
+    if not force_polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths, ignore=ignore, debounce=debounce)
+        except OSError:
+            logger.warning('Cannot use inotify, falling back to polling for modifications', exc_info=True)
+
+    return PollingWatcher(paths, ignore=ignore, debounce=debounce)
+
+
+class _Watcher:
+    """Common functionality of the watchers, tracks which paths are watched and ignored."""
+
+    def __init__(self, paths, ignore=(), debounce=DEFAULT_DEBOUNCE):
+        self.debounce = debounce
+
+        # Directories are watched recursively, files are watched through their parent directory.
+        self._directories = []
+        self._files = set()
+        for path in paths:
+            path = pathlib.Path(path).resolve()
+            if path.is_dir():
+                self._directories.append(path)
+            else:
+                self._files.add(path)
+
+        self._ignore = [pathlib.Path(path).resolve() for path in ignore]
+
+    def wait(self, timeout=None):
+        """
+        Block until modifications have been made, and the file system has been quiet for the debounce period.
+        :param timeout: maximum number of seconds to wait for the first modification, None waits forever.
+        :return: set of the paths that were modified, None if the watcher lost track of the modifications and everything
+        should be treated as modified.  The set is empty if the timeout expired.
+        """
+        changes = self._read(timeout)
+        if not changes and changes is not None:
+            return changes
+
+        while True:
+            more_changes = self._read(self.debounce)
+            if not more_changes and more_changes is not None:
+                return changes
+
+            if changes is None or more_changes is None:
+                changes = None
+            else:
+                changes |= more_changes
+
+    def close(self):
+        """Release the resources used by the watcher."""
+        pass
+
+    def _read(self, timeout):
+        """Wait up to timeout seconds for modifications, returning the set of modified paths."""
+        raise NotImplementedError()
+
+    def _is_watched(self, path):
+        """Determine if modifications of the path should be reported."""
+        if any(path == ignored or ignored in path.parents for ignored in self._ignore):
+            return False
+
+        return path in self._files or any(path == directory or directory in path.parents
+                                          for directory in self._directories)
+
+
+class PollingWatcher(_Watcher):
+    """Watcher that compares the modification times and sizes of the watched files."""
+
+    def __init__(self, paths, ignore=(), debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(paths, ignore=ignore, debounce=debounce)
+        self.poll_interval = poll_interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        """Collect the modification time and size of all of the watched files."""
+        snapshot = {}
+        candidates = list(self._files)
+        for directory in self._directories:
+            candidates.extend(directory.glob('**/*'))
+
+        for path in candidates:
+            if not self._is_watched(path):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+
+        return snapshot
+
+    def _read(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            snapshot = self._scan()
+            changes = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+
+            if changes:
+                return changes
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return changes
+                time.sleep(min(self.poll_interval, remaining))
+            else:
+                time.sleep(self.poll_interval)
+
+
+class InotifyWatcher(_Watcher):
+    """Watcher that is notified of modifications by the Linux kernel."""
+
+    def __init__(self, paths, ignore=(), debounce=DEFAULT_DEBOUNCE):
+        super().__init__(paths, ignore=ignore, debounce=debounce)
+
+        library = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(library or 'libc.so.6', use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        # Watch descriptors and the directories that they belong to
+        self._watches = {}
+
+        try:
+            for directory in self._directories:
+                self._add_tree(directory)
+            for parent in {file.parent for file in self._files}:
+                self._add_watch(parent)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_watch(self, directory):
+        """Start watching a single directory."""
+        descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), _WATCH_MASK)
+        if descriptor < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, 'Cannot watch {}: {}'.format(directory, os.strerror(error)))
+        self._watches[descriptor] = directory
+
+    def _add_tree(self, directory):
+        """Start watching a directory and all of the directories contained within it."""
+        if not self._is_watched(directory):
+            return
+
+        self._add_watch(directory)
+        for path in directory.glob('**/*'):
+            if path.is_dir() and self._is_watched(path):
+                self._add_watch(path)
+
+    def _read(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # Events are also received for paths that are not watched (files next to a watched file), so keep reading
+        # until there is a watched modification or the timeout expires.
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+
+            changes = self._read_events()
+            if changes is None or changes:
+                return changes
+
+    def _read_events(self):
+        """Read the pending events, returning the set of modified paths that are watched."""
+        changes = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changes
+
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                return None
+
+            if mask & _IN_IGNORED:
+                self._watches.pop(descriptor, None)
+                continue
+
+            directory = self._watches.get(descriptor)
+            if directory is None:
+                continue
+
+            path = directory / os.fsdecode(name) if name else directory
+
+            # New directories need to be watched as well, the files that were created inside of them before the watch
+            # was added are found by the rebuild.
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                try:
+                    self._add_tree(path)
+                except OSError:
+                    logger.warning('Cannot watch directory: {}'.format(path), exc_info=True)
+
+            if self._is_watched(path):
+                changes.add(path)
+
+        return changes
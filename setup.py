@@ -31,7 +31,6 @@ setup(
         'Jinja2>=2.9.6,<3',
         'Markdown>=2.6.9,<3',
         'munch>=2.2.0,<3',
-        'Pypubsub>=4.0.0,<5',
         'python-frontmatter>=0.4.2,<0.5',
         'PyYAML>=3.12,<4',
         'requests>=2.18.4',
@@ -67,6 +66,8 @@ setup(
                               'export_log_template=autology.commands.subcommands.export_log_templates:register_command',
                               'dump_config=autology.commands.subcommands.dump_config:register_command',
                               'update=autology.commands.subcommands.update:register_command',
+                              'index=autology.commands.subcommands.index:register_command',
+                              'templates=autology.commands.subcommands.templates:register_command',
                               ],
 
         # These are instantiations of Template named tuples